@@ -2,51 +2,88 @@ import os
 import json
 import glob
 from collections import Counter
-import re
+import shutil
+import argparse
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+from analyzers.boilerplate import BoilerplateModel
+from analyzers.keyword_analytics import KeywordAnalytics, tokenize
+from utils.results_store import read_results, import_json_results, configured_dataset_dir
 
-def load_results(results_dir='data/processed'):
-    """Load all JSON result files"""
-    result_files = glob.glob(os.path.join(results_dir, "gpu_videos_*.json"))
+def load_config():
+    """config.json next to src/, or an empty config if there is none"""
+    config_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.json')
+    try:
+        with open(config_path, 'r') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Error loading config: {str(e)}")
+        return {}
+
+def load_results(results_dir='data/processed', gpu_only=False, min_confidence=None, since_days=None,
+                 dataset_dir=None):
+    """
+    Load results from the Parquet dataset (all runs, latest result per video).
+    Falls back to the newest gpu_videos_<timestamp>.json dump in results_dir
+    for trees that predate the dataset.
+    """
+    dataset_dir = dataset_dir or os.path.join(results_dir, 'results')
+    if os.path.isdir(dataset_dir):
+        print(f"Loading results from {dataset_dir}")
+        frame = read_results(dataset_dir, gpu_only=gpu_only, min_confidence=min_confidence, since_days=since_days)
+        frame = frame.drop(columns=['date', 'processed_at'])
+        # Missing values become missing keys, matching the dicts process_video produces
+        return [{key: value for key, value in record.items() if pd.notna(value)}
+                for record in frame.to_dict('records')]
     
-    # Sort by modification time (newest first)
-    result_files.sort(key=lambda x: os.path.getmtime(x), reverse=True)
+    # Final dumps only; partial dumps are prefixes of them
+    result_files = [path for path in glob.glob(os.path.join(results_dir, "gpu_videos_*.json"))
+                    if not os.path.basename(path).startswith("gpu_videos_partial_")]
     
     if not result_files:
         print(f"No result files found in {results_dir}")
         return []
     
-    # Load the most recent file
-    latest_file = result_files[0]
+    # File names carry the run timestamp, so the newest sorts last
+    latest_file = max(result_files)
     print(f"Loading results from {latest_file}")
     
     with open(latest_file, 'r') as f:
         return json.load(f)
 
-def extract_keywords(videos):
-    """Extract common keywords from GPU-related videos"""
-    all_text = ""
+def extract_keywords(videos, boilerplate=None):
+    """Extract common keywords from GPU-related videos, ignoring description boilerplate"""
+    word_counts = Counter()
     for video in videos:
-        all_text += video.get('title', '') + " " + video.get('description', '') + " "
-        if 'transcript_snippet' in video:
-            all_text += video['transcript_snippet'] + " "
-    
-    # Clean and tokenize
-    text = re.sub(r'[^\w\s]', ' ', all_text.lower())
-    words = text.split()
-    
-    # Remove common words
-    common_words = {'the', 'a', 'an', 'and', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-                   'is', 'was', 'be', 'as', 'this', 'that', 'it', 'by', 'from', 'not',
-                   'what', 'all', 'are', 'but', 'so', 'no', 'yes', 'we', 'you', 'i', 'he',
-                   'she', 'they', 'how', 'why', 'when', 'where', 'which', 'who', 'or'}
-    
-    filtered_words = [word for word in words if word not in common_words and len(word) > 2]
-    word_counts = Counter(filtered_words)
+        description = video.get('description', '')
+        if boilerplate:
+            description = boilerplate.strip(description)
+        word_counts.update(tokenize(video.get('title', '')))
+        word_counts.update(tokenize(description))
+        word_counts.update(tokenize(video.get('transcript_snippet', '')))
     
     return word_counts
 
 def main():
-    results = load_results()
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Analyze processed video results")
+    parser.add_argument('--results-dir', default=config.get('output', {}).get('processed_data_path', 'data/processed'),
+                        help="Where the JSON dumps and keyword index live")
+    parser.add_argument('--dataset-dir', help="Results dataset (default: output.dataset_path from config.json)")
+    parser.add_argument('--since-days', type=int, help="Only results from the last N days")
+    parser.add_argument('--import-json', action='store_true',
+                        help="First import old gpu_videos_*.json dumps into the results dataset")
+    parser.add_argument('--rebuild-index', action='store_true',
+                        help="Recount keyword statistics from scratch instead of updating them")
+    parser.add_argument('--trend-days', type=int, default=30, help="Window size for trending keywords")
+    args = parser.parse_args()
+    dataset_dir = args.dataset_dir or configured_dataset_dir(config)
+    
+    if args.import_json:
+        imported = import_json_results(args.results_dir, dataset_dir)
+        print(f"Imported {imported} results from JSON dumps")
+    
+    results = load_results(args.results_dir, since_days=args.since_days, dataset_dir=dataset_dir)
     
     if not results:
         print("No results to analyze")
@@ -60,10 +97,35 @@ def main():
     print(f"GPU-related videos: {len(gpu_videos)} ({len(gpu_videos)/len(results)*100:.1f}%)")
     print(f"Non-GPU videos: {len(non_gpu_videos)} ({len(non_gpu_videos)/len(results)*100:.1f}%)")
     
-    # Analyze GPU video content
-    if gpu_videos:
+    if os.path.isdir(dataset_dir):
+        # Keyword statistics over the full history, updated incrementally from the dataset
+        index_dir = os.path.join(args.results_dir, 'keyword_index')
+        if args.rebuild_index and os.path.isdir(index_dir):
+            shutil.rmtree(index_dir)
+        analytics = KeywordAnalytics(index_dir)
+        added = analytics.update(dataset_dir)
+        analytics.save()
+        since = datetime.now(timezone.utc) - timedelta(days=args.since_days) if args.since_days else None
+        
+        print("\n===== GPU VIDEOS KEYWORD ANALYSIS =====")
+        print(f"Keyword index covers {len(analytics.video_ids)} videos ({added} new)")
+        print("Top 20 keywords in GPU-related videos:")
+        for word, count in analytics.top_k(20, gpu=True, since=since):
+            print(f"  {word}: {count}")
+        
+        print("\nMost GPU-specific keywords (log-odds vs. non-GPU videos):")
+        for word, score in analytics.contrast(20, since=since):
+            print(f"  {word}: {score:.2f}")
+        
+        print(f"\nTrending keywords (last {args.trend_days} days vs. the {args.trend_days} before):")
+        for word, score in analytics.trending(args.trend_days, 20):
+            print(f"  {word}: {score:+.2f}")
+    elif gpu_videos:
         print("\n===== GPU VIDEOS KEYWORD ANALYSIS =====")
-        word_counts = extract_keywords(gpu_videos)
+        # Learn repeated description lines from every result, not just the GPU ones
+        boilerplate = BoilerplateModel('results')
+        boilerplate.learn(results)
+        word_counts = extract_keywords(gpu_videos, boilerplate)
         
         print("Top 20 keywords in GPU-related videos:")
         for word, count in word_counts.most_common(20):
@@ -0,0 +1,135 @@
+import json
+import hashlib
+import os
+import re
+from utils.atomic_file import locked, write_json_atomic
+
+class BoilerplateModel:
+    """
+    Learns the lines a channel repeats in every description (shop links,
+    social links, sign-off footers) so they can be stripped before
+    classification and keyword extraction.
+
+    A line counts as boilerplate once it appears in at least `min_videos`
+    descriptions and in at least `min_fraction` of all descriptions seen.
+    Counts are per video, so a line repeated inside one description only
+    counts once, and each video_id is only learned once.
+    """
+
+    def __init__(self, channel, min_videos=3, min_fraction=0.2):
+        self.channel = channel
+        self.min_videos = min_videos
+        self.min_fraction = min_fraction
+        self.line_counts = {}
+        self.seen_videos = set()
+        self.seen_descriptions = set()
+        # Videos learned since the last load/save, replayed onto the file on save
+        self._pending = []
+
+    @staticmethod
+    def _normalize(line):
+        return re.sub(r'\s+', ' ', line).strip().lower()
+
+    def learn(self, videos):
+        """Update line counts from video dicts with 'id' and 'description'"""
+        entries = []
+        for video in videos:
+            video_id = video.get('id') or video.get('video_id')
+            description = video.get('description') or ''
+            if not description.strip():
+                continue
+            digest = hashlib.sha1(description.strip().encode('utf-8')).hexdigest()
+            lines = {self._normalize(line) for line in description.splitlines()}
+            lines.discard('')
+            entries.append((video_id, digest, lines))
+        self._pending.extend(self._apply(entries))
+
+    def _apply(self, entries):
+        """Count (video_id, digest, lines) entries not seen yet; returns the ones that were new"""
+        applied = []
+        for video_id, digest, lines in entries:
+            if video_id in self.seen_videos:
+                continue
+            self.seen_videos.add(video_id)
+            applied.append((video_id, digest, lines))
+            # Re-uploads repeat a whole description; counting it again would mark all of it as boilerplate
+            if digest in self.seen_descriptions:
+                continue
+            self.seen_descriptions.add(digest)
+            for line in lines:
+                self.line_counts[line] = self.line_counts.get(line, 0) + 1
+        return applied
+
+    def is_boilerplate(self, line):
+        count = self.line_counts.get(self._normalize(line), 0)
+        return count >= self.min_videos and count >= self.min_fraction * len(self.seen_descriptions or self.seen_videos)
+
+    def strip(self, text):
+        """Remove boilerplate lines (and the blank-line runs they leave behind)"""
+        if not text:
+            return text
+        kept = [line for line in text.splitlines() if not self.is_boilerplate(line)]
+        return re.sub(r'\n{3,}', '\n\n', '\n'.join(kept)).strip()
+
+    def _state(self):
+        return {
+            'channel': self.channel,
+            'line_counts': self.line_counts,
+            'seen_videos': sorted(self.seen_videos),
+            'seen_descriptions': sorted(self.seen_descriptions),
+        }
+
+    def _set_state(self, data):
+        self.line_counts = data.get('line_counts', {})
+        self.seen_videos = set(data.get('seen_videos', []))
+        self.seen_descriptions = set(data.get('seen_descriptions', []))
+
+    def save(self, path):
+        """
+        Write the model atomically, merged with what other processes saved
+        since it was loaded: the videos learned here are replayed onto the
+        file's counts, so concurrent workers don't overwrite each other.
+        """
+        with locked(path):
+            merged = BoilerplateModel(self.channel, self.min_videos, self.min_fraction)
+            try:
+                with open(path, 'r') as f:
+                    merged._set_state(json.load(f))
+                merged._apply(self._pending)
+            except FileNotFoundError:
+                merged = self
+            except (json.JSONDecodeError, IOError) as e:
+                # Unreadable file: what we have in memory is the best copy there is
+                print(f"Boilerplate model read error for {self.channel}, overwriting: {str(e)}")
+                merged = self
+            write_json_atomic(path, merged._state())
+        self._set_state(merged._state())
+        self._pending = []
+
+    @classmethod
+    def load(cls, channel, path, **kwargs):
+        """Load a saved model, or start an empty one if there is none yet"""
+        model = cls(channel, **kwargs)
+        if os.path.exists(path):
+            try:
+                with open(path, 'r') as f:
+                    model._set_state(json.load(f))
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Boilerplate model read error for {channel}, relearning: {str(e)}")
+        return model
+
+def boilerplate_path(cache_dir, channel):
+    """Where the model for a channel handle like '@geohotarchive' is stored"""
+    safe_channel = re.sub(r'[^\w.-]', '_', channel.lstrip('@'))
+    return os.path.join(cache_dir, f"boilerplate_{safe_channel}.json")
+
+def load_channel_boilerplate(cache_dir, channel, videos=()):
+    """Load a channel's model, learn from any new videos and save it back"""
+    path = boilerplate_path(cache_dir, channel)
+    model = BoilerplateModel.load(channel, path)
+    model.learn(videos)
+    try:
+        model.save(path)
+    except IOError as e:
+        print(f"Boilerplate model write error for {channel}: {str(e)}")
+    return model
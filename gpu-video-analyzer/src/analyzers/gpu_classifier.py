@@ -4,11 +4,24 @@ import os
 import logging
 
 class GPUClassifier:
-    def __init__(self, model_name="deepseek-ai/deepseek-coder-7b-base", use_fallback=True):
+    GPU_KEYWORDS = ['GPU', 'graphics card', 'video card', 'NVIDIA', 'AMD', 
+                    'GeForce', 'Radeon', 'RTX', 'GTX', 'RX', 'DLSS', 'ray tracing']
+    
+    PROMPT_TEMPLATE = """Analyze the following YouTube video content and determine if it's primarily about GPUs or graphics cards.
+        
+{content}
+
+Consider specific GPU models, graphics technologies, performance metrics, or gaming graphics discussions as GPU-related.
+
+Question: Is this content primarily about GPUs, graphics cards, or graphics technology?
+Answer with 'Yes' or 'No', followed by your confidence score (0-100%) and a brief explanation.
+"""
+    
+    def __init__(self, model_name="deepseek-ai/deepseek-coder-7b-base", use_fallback=True, prompt_token_budget=768):
         self.use_llm = True
         self.use_fallback = use_fallback
-        self.gpu_keywords = ['GPU', 'graphics card', 'video card', 'NVIDIA', 'AMD', 
-                            'GeForce', 'Radeon', 'RTX', 'GTX', 'RX', 'DLSS', 'ray tracing']
+        self.prompt_token_budget = prompt_token_budget
+        self.gpu_keywords = self.GPU_KEYWORDS
         
         try:
             logging.info(f"Loading {model_name} model...")
@@ -42,24 +55,7 @@ class GPUClassifier:
         if not self.use_llm:
             return self._keyword_classification(title)
         
-        # Prepare content for analysis
-        content = f"Title: {title}\n"
-        if description:
-            content += f"Description: {description}\n"
-        if transcript:
-            # Use a snippet of transcript if it's too long
-            content += f"Transcript snippet: {transcript[:500]}...\n" if len(transcript) > 500 else f"Transcript: {transcript}\n"
-        
-        # Create prompt for the model
-        prompt = f"""Analyze the following YouTube video content and determine if it's primarily about GPUs or graphics cards.
-        
-{content}
-
-Consider specific GPU models, graphics technologies, performance metrics, or gaming graphics discussions as GPU-related.
-
-Question: Is this content primarily about GPUs, graphics cards, or graphics technology?
-Answer with 'Yes' or 'No', followed by your confidence score (0-100%) and a brief explanation.
-"""
+        prompt = self._build_prompt(title, description, transcript)
         
         # Generate response from model
         try:
@@ -70,19 +66,11 @@ Answer with 'Yes' or 'No', followed by your confidence score (0-100%) and a brie
                     max_new_tokens=200,
                     temperature=0.1
                 )
-            response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            response = response.replace(prompt, "").strip()
-            
-            # Extract decision from model response
-            is_gpu_related = "yes" in response.lower()[:10]
+            # Decode only the generated continuation, not the prompt
+            prompt_length = inputs['input_ids'].shape[1]
+            response = self.tokenizer.decode(outputs[0][prompt_length:], skip_special_tokens=True).strip()
             
-            # Try to extract confidence score
-            confidence_score = 0.7  # Default if we can't parse one
-            
-            # Extract explanation
-            explanation = response
-            
-            return (is_gpu_related, confidence_score, explanation)
+            return self._parse_response(response)
             
         except Exception as e:
             logging.error(f"Error using LLM for classification: {str(e)}")
@@ -90,6 +78,101 @@ Answer with 'Yes' or 'No', followed by your confidence score (0-100%) and a brie
                 return self._keyword_classification(title)
             raise e
     
+    def is_gpu_related_batch(self, items):
+        """
+        Classify several videos with one padded generate() call
+        
+        Args:
+            items (list): dicts with 'title' and optional 'description'/'transcript'
+            
+        Returns:
+            list: one (is_gpu_related, confidence_score, reasoning) tuple per item
+        """
+        if not items:
+            return []
+        if not self.use_llm:
+            return [self._keyword_classification(item['title']) for item in items]
+        
+        prompts = [self._build_prompt(item['title'], item.get('description'), item.get('transcript'))
+                   for item in items]
+        try:
+            # Decoder-only models need left padding so every prompt ends where generation starts
+            self.tokenizer.padding_side = "left"
+            if self.tokenizer.pad_token is None:
+                self.tokenizer.pad_token = self.tokenizer.eos_token
+            inputs = self.tokenizer(prompts, return_tensors="pt", padding=True).to(self.model.device)
+            with torch.no_grad():
+                outputs = self.model.generate(
+                    **inputs,
+                    max_new_tokens=200,
+                    temperature=0.1,
+                    pad_token_id=self.tokenizer.pad_token_id
+                )
+            prompt_length = inputs['input_ids'].shape[1]
+            responses = self.tokenizer.batch_decode(outputs[:, prompt_length:], skip_special_tokens=True)
+            return [self._parse_response(response.strip()) for response in responses]
+        
+        except Exception as e:
+            logging.error(f"Error using LLM for batch classification: {str(e)}")
+            if self.use_fallback:
+                return [self._keyword_classification(item['title']) for item in items]
+            raise e
+    
+    def _count_tokens(self, text):
+        return len(self.tokenizer.encode(text, add_special_tokens=False))
+    
+    def _truncate_tokens(self, text, max_tokens):
+        """Cut text to at most max_tokens tokens. Returns (text, was_truncated)."""
+        if max_tokens <= 0:
+            return "", bool(text)
+        token_ids = self.tokenizer.encode(text, add_special_tokens=False)
+        if len(token_ids) <= max_tokens:
+            return text, False
+        return self.tokenizer.decode(token_ids[:max_tokens]), True
+    
+    def _build_prompt(self, title, description=None, transcript=None):
+        """
+        Build the classification prompt for one video within prompt_token_budget tokens
+        
+        The instructions and title are always kept. The description gets the
+        remaining budget first (half of it when there is also a transcript),
+        and the transcript gets whatever is left.
+        """
+        content = f"Title: {title}\n"
+        remaining = self.prompt_token_budget - self._count_tokens(self.PROMPT_TEMPLATE.format(content=content))
+        
+        if description and remaining > 0:
+            description_budget = remaining // 2 if transcript else remaining
+            description, truncated = self._truncate_tokens(description, description_budget)
+            if description:
+                line = f"Description: {description}{'...' if truncated else ''}\n"
+                content += line
+                remaining -= self._count_tokens(line)
+        if transcript and remaining > 0:
+            transcript, truncated = self._truncate_tokens(transcript, remaining)
+            if transcript:
+                content += f"Transcript snippet: {transcript}...\n" if truncated else f"Transcript: {transcript}\n"
+        
+        # Create prompt for the model
+        return self.PROMPT_TEMPLATE.format(content=content)
+    
+    def _parse_response(self, response):
+        """Turn the model's answer into (is_gpu_related, confidence_score, reasoning)"""
+        # Extract decision from model response
+        is_gpu_related = "yes" in response.lower()[:10]
+        
+        # Try to extract confidence score
+        confidence_score = 0.7  # Default if we can't parse one
+        
+        # Extract explanation
+        explanation = response
+        
+        return (is_gpu_related, confidence_score, explanation)
+    
+    def is_gpu_related_cheap(self, title, description=None):
+        """Keyword-only classification, for videos that don't warrant an LLM call (e.g. near duplicates)"""
+        return self._keyword_classification(title)
+    
     def _keyword_classification(self, title):
         """Fallback keyword-based classification method"""
         title_lower = title.lower()
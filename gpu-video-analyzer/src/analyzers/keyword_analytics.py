@@ -0,0 +1,222 @@
+import os
+import re
+import json
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from utils.results_store import read_results, dataset_files
+
+STOP_WORDS = {'the', 'a', 'an', 'and', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+              'is', 'was', 'be', 'as', 'this', 'that', 'it', 'by', 'from', 'not',
+              'what', 'all', 'are', 'but', 'so', 'no', 'yes', 'we', 'you', 'i', 'he',
+              'she', 'they', 'how', 'why', 'when', 'where', 'which', 'who', 'or'}
+
+TEXT_COLUMNS = ['title', 'description', 'transcript_snippet']
+
+EPOCH = pd.Timestamp(0, tz='UTC')
+MICROSECONDS_PER_DAY = 24 * 3600 * 10 ** 6
+
+def tokenize(text):
+    """Lowercase words of 3+ characters, punctuation and stop words removed"""
+    words = re.sub(r'[^\w\s]', ' ', text.lower()).split()
+    return [word for word in words if word not in STOP_WORDS and len(word) > 2]
+
+class KeywordAnalytics:
+    """
+    Persistent per-video term counts over the whole results history.
+
+    Rows of a sparse videos x terms count matrix are kept with each video's
+    GPU label and processing time. update() only reads the dataset files it
+    has not ingested yet, whatever their processed_at (imported dumps and
+    workers with skewed clocks write old timestamps late), and replaces the
+    rows of videos whose new result is more recent. Queries are column sums
+    and arithmetic over the sparse matrix, so they stay fast as history grows.
+
+    Files in `index_dir`: counts.npz (matrix), rows.npz (per-row metadata),
+    vocabulary.json (term list) and state.json (dataset files ingested).
+    """
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        self.vocabulary = []
+        self.term_index = {}
+        self.counts = sparse.csr_matrix((0, 0), dtype=np.int32)
+        self.video_ids = np.array([], dtype=object)
+        self.is_gpu = np.array([], dtype=bool)
+        self.processed_at = np.array([], dtype=np.int64)  # microseconds since the epoch
+        self.ingested = set()  # dataset files already folded in, relative to the dataset
+        self._load()
+
+    def _path(self, name):
+        return os.path.join(self.index_dir, name)
+
+    def _load(self):
+        if not os.path.exists(self._path('state.json')):
+            return
+        try:
+            with open(self._path('state.json'), 'r') as f:
+                state = json.load(f)
+            if 'ingested' not in state:
+                # Older indexes tracked a processed_at watermark, which misses late writes
+                print("Keyword index predates file tracking, rebuilding")
+                return
+            with open(self._path('vocabulary.json'), 'r') as f:
+                self.vocabulary = json.load(f)
+            rows = np.load(self._path('rows.npz'), allow_pickle=False)
+            self.counts = sparse.load_npz(self._path('counts.npz')).tocsr()
+        except (IOError, ValueError) as e:
+            # Leave the empty defaults in place; the next update() rebuilds from the dataset
+            print(f"Keyword index read error, rebuilding: {str(e)}")
+            self.vocabulary = []
+            return
+        self.term_index = {term: i for i, term in enumerate(self.vocabulary)}
+        self.video_ids = rows['video_ids'].astype(object)
+        self.is_gpu = rows['is_gpu']
+        self.processed_at = rows['processed_at']
+        self.ingested = set(state['ingested'])
+
+    def save(self):
+        os.makedirs(self.index_dir, exist_ok=True)
+        sparse.save_npz(self._path('counts.npz'), self.counts)
+        np.savez(self._path('rows.npz'), video_ids=self.video_ids.astype(str), is_gpu=self.is_gpu,
+                 processed_at=self.processed_at)
+        with open(self._path('vocabulary.json'), 'w') as f:
+            json.dump(self.vocabulary, f)
+        with open(self._path('state.json'), 'w') as f:
+            json.dump({'ingested': sorted(self.ingested)}, f)
+
+    @property
+    def days(self):
+        """Processing day of every row, as days since the epoch"""
+        return self.processed_at // MICROSECONDS_PER_DAY
+
+    def update(self, dataset_dir):
+        """Fold dataset files written since the last update into the index. Returns rows added or replaced."""
+        new_files = [path for path in dataset_files(dataset_dir) if path not in self.ingested]
+        frame = read_results(dataset_dir, columns=['video_id', 'is_gpu_related', 'processed_at'] + TEXT_COLUMNS,
+                             files=new_files)
+        self.ingested.update(new_files)
+
+        # A result that arrives late but is older than the one indexed doesn't replace it
+        processed_at = ((pd.to_datetime(frame['processed_at'], utc=True) - EPOCH)
+                        // pd.Timedelta(microseconds=1)).to_numpy(dtype=np.int64)
+        if len(self.video_ids):
+            position = pd.Index(self.video_ids).get_indexer(frame['video_id'])
+            indexed_at = np.where(position >= 0, self.processed_at[position], np.iinfo(np.int64).min)
+            newer = processed_at >= indexed_at
+            frame = frame[newer].reset_index(drop=True)
+            processed_at = processed_at[newer]
+        if frame.empty:
+            return 0
+
+        # Tokenize new videos and map terms to column ids, growing the vocabulary as needed
+        row_ids, col_ids = [], []
+        texts = frame[TEXT_COLUMNS].fillna('').agg(' '.join, axis=1)
+        for row, text in enumerate(texts):
+            for term in tokenize(text):
+                col = self.term_index.get(term)
+                if col is None:
+                    col = self.term_index[term] = len(self.vocabulary)
+                    self.vocabulary.append(term)
+                row_ids.append(row)
+                col_ids.append(col)
+
+        # Duplicate (row, col) pairs are summed into counts on conversion
+        new_counts = sparse.csr_matrix(
+            (np.ones(len(row_ids), dtype=np.int32), (row_ids, col_ids)),
+            shape=(len(frame), len(self.vocabulary))
+        )
+
+        # Re-processed videos replace their old rows
+        keep = ~np.isin(self.video_ids, frame['video_id'].to_numpy())
+        old_counts = self.counts[keep]
+        old_counts.resize((old_counts.shape[0], len(self.vocabulary)))
+
+        self.counts = sparse.vstack([old_counts, new_counts], format='csr')
+        self.video_ids = np.concatenate([self.video_ids[keep], frame['video_id'].to_numpy(dtype=object)])
+        self.is_gpu = np.concatenate([self.is_gpu[keep], frame['is_gpu_related'].fillna(False).to_numpy(dtype=bool)])
+        self.processed_at = np.concatenate([self.processed_at[keep], processed_at])
+        return len(frame)
+
+    def _row_mask(self, gpu=None, since=None, until=None):
+        """Boolean row selection; since/until are datetimes, gpu is True/False/None for all"""
+        mask = np.ones(len(self.video_ids), dtype=bool)
+        if gpu is not None:
+            mask &= self.is_gpu == gpu
+        if since is not None:
+            mask &= self.days >= _day_number(since)
+        if until is not None:
+            mask &= self.days < _day_number(until)
+        return mask
+
+    def term_totals(self, **selection):
+        """Total count of every term over the selected rows"""
+        mask = self._row_mask(**selection)
+        return np.asarray(self.counts[mask].sum(axis=0)).ravel()
+
+    def _top(self, scores, k, valid=None):
+        if valid is not None:
+            scores = np.where(valid, scores, -np.inf)
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.vocabulary[i], float(scores[i])) for i in top]
+
+    def top_k(self, k=20, gpu=None, since=None, until=None):
+        """Most frequent terms in the selected videos"""
+        totals = self.term_totals(gpu=gpu, since=since, until=until)
+        return [(term, int(count)) for term, count in self._top(totals.astype(float), k, totals > 0)]
+
+    def trending(self, window_days=30, k=20, now=None, min_count=3):
+        """
+        Terms whose share of all term occurrences rose most in the last
+        window_days compared with the window before it (smoothed log ratio).
+        """
+        now = now or datetime.now(timezone.utc)
+        current_start = now - pd.Timedelta(days=window_days)
+        previous_start = current_start - pd.Timedelta(days=window_days)
+        current = self.term_totals(since=current_start, until=now + pd.Timedelta(days=1))
+        previous = self.term_totals(since=previous_start, until=current_start)
+        vocab_size = max(len(self.vocabulary), 1)
+        current_rate = (current + 1) / (current.sum() + vocab_size)
+        previous_rate = (previous + 1) / (previous.sum() + vocab_size)
+        return self._top(np.log(current_rate / previous_rate), k, current >= min_count)
+
+    def contrast(self, k=20, method='log_odds', since=None, until=None, min_count=2):
+        """
+        Terms most characteristic of GPU-related videos versus the rest.
+
+        'log_odds' is the log-odds ratio with an informative Dirichlet prior
+        (z-scored, as in Monroe et al. 2008); 'tfidf' scores GPU term
+        frequency by inverse document frequency across all selected videos.
+        """
+        gpu_totals = self.term_totals(gpu=True, since=since, until=until)
+        other_totals = self.term_totals(gpu=False, since=since, until=until)
+        valid = gpu_totals >= min_count
+
+        if method == 'tfidf':
+            mask = self._row_mask(since=since, until=until)
+            document_frequency = np.asarray((self.counts[mask] > 0).sum(axis=0)).ravel()
+            idf = np.log((1 + mask.sum()) / (1 + document_frequency)) + 1
+            return self._top(gpu_totals / max(gpu_totals.sum(), 1) * idf, k, valid)
+        if method != 'log_odds':
+            raise ValueError(f"Unknown contrast method: {method}")
+
+        prior = gpu_totals + other_totals + 0.01
+        prior_total = prior.sum()
+        gpu_total = gpu_totals.sum()
+        other_total = other_totals.sum()
+        gpu_log_odds = np.log((gpu_totals + prior) / (gpu_total + prior_total - gpu_totals - prior))
+        other_log_odds = np.log((other_totals + prior) / (other_total + prior_total - other_totals - prior))
+        variance = 1 / (gpu_totals + prior) + 1 / (other_totals + prior)
+        return self._top((gpu_log_odds - other_log_odds) / np.sqrt(variance), k, valid)
+
+def _day_number(moment):
+    """Days since the epoch for a datetime (naive values are taken as UTC)"""
+    timestamp = pd.Timestamp(moment)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize('UTC')
+    return (timestamp - EPOCH).days
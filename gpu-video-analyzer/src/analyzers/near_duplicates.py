@@ -0,0 +1,227 @@
+import json
+import os
+import re
+import zlib
+import hashlib
+import numpy as np
+from utils.atomic_file import locked, write_json_atomic
+
+# 128 hash functions split into 16 bands of 8 rows: pairs above ~0.7 Jaccard
+# almost always share a band, pairs below ~0.4 almost never do
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+NEAR_THRESHOLD = 0.7
+
+_MERSENNE_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(1)
+# Fixed seed: signatures have to stay comparable across runs
+_PERM_A = _rng.randint(1, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, _MERSENNE_PRIME, size=NUM_PERM, dtype=np.uint64)
+
+def normalize_text(text):
+    """Lowercase, drop URLs and punctuation, and blank out digits so stream dates don't matter"""
+    text = re.sub(r'https?://\S+', ' ', (text or '').lower())
+    text = re.sub(r'\d+', '0', text)
+    return re.sub(r'[^\w\s]', ' ', text).split()
+
+def shingles(text, size=3):
+    """Word n-gram shingles of the normalized text (the words themselves for very short text)"""
+    words = normalize_text(text)
+    if len(words) < size:
+        return set(words)
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def minhash(shingle_set):
+    """MinHash signature (NUM_PERM uint64 values) of a set of shingles"""
+    if not shingle_set:
+        return np.full(NUM_PERM, _MERSENNE_PRIME, dtype=np.uint64)
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) % _MERSENNE_PRIME for s in shingle_set),
+                         dtype=np.uint64, count=len(shingle_set))
+    # (a * x + b) mod p for every hash function at once; a, x < 2^31 so nothing overflows
+    permuted = (np.outer(hashes, _PERM_A) + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+def video_text(video):
+    """
+    The text a video is compared on: title and description. The transcript is
+    left out on purpose: it is only fetched after classification, which is
+    exactly the work a duplicate match is meant to skip.
+    """
+    return ' '.join(filter(None, [video.get('title'), video.get('description')]))
+
+def content_hash(video):
+    """Hash of title + description with only case/whitespace normalized, for exact re-uploads"""
+    text = ' '.join(filter(None, [video.get('title'), video.get('description')]))
+    return hashlib.sha1(re.sub(r'\s+', ' ', text.lower()).strip().encode('utf-8')).hexdigest()
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index of videos already seen, persisted as JSON.
+
+    match() classifies a new video against the index:
+      - 'exact': same title and description, or a near match with the same
+        duration (a re-upload of the same VOD). Its earlier verdict and
+        transcript can be reused.
+      - 'near': estimated Jaccard similarity >= near_threshold. Worth a
+        cheap classification instead of the LLM.
+    """
+
+    def __init__(self, near_threshold=NEAR_THRESHOLD):
+        self.near_threshold = near_threshold
+        self.videos = {}  # video_id -> {'signature', 'hash', 'duration'}
+        self.buckets = [{} for _ in range(BANDS)]
+        self._changed = set()  # ids added or removed since load, replayed onto the file by save()
+
+    def _band_keys(self, signature):
+        return [signature[band * ROWS:(band + 1) * ROWS].tobytes().hex() for band in range(BANDS)]
+
+    def add(self, video):
+        video_id = video.get('id') or video.get('video_id')
+        if video_id in self.videos:
+            self.remove(video_id)
+        self._changed.add(video_id)
+        shingle_set = shingles(video_text(video))
+        # Videos we know nothing about (e.g. failed scrapes with empty titles) would all look identical
+        if not shingle_set:
+            return
+        signature = minhash(shingle_set)
+        self.videos[video_id] = {
+            'signature': signature,
+            'hash': content_hash(video),
+            'duration': video.get('duration'),
+        }
+        for band, key in enumerate(self._band_keys(signature)):
+            self.buckets[band].setdefault(key, set()).add(video_id)
+
+    def remove(self, video_id):
+        entry = self.videos.pop(video_id, None)
+        if entry is None:
+            return
+        self._changed.add(video_id)
+        for band, key in enumerate(self._band_keys(entry['signature'])):
+            self.buckets[band].get(key, set()).discard(video_id)
+
+    def candidates(self, signature, exclude=None):
+        """Ids sharing at least one LSH band with the signature"""
+        found = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            found |= self.buckets[band].get(key, set())
+        found.discard(exclude)
+        return found
+
+    def match(self, video):
+        """
+        Best earlier match for a video, or None.
+
+        Returns:
+            dict: {'video_id', 'kind' ('exact' or 'near'), 'similarity'}
+        """
+        video_id = video.get('id') or video.get('video_id')
+        shingle_set = shingles(video_text(video))
+        if not shingle_set:
+            return None
+        signature = minhash(shingle_set)
+        digest = content_hash(video)
+        duration = video.get('duration')
+
+        best = None
+        for candidate_id in self.candidates(signature, exclude=video_id):
+            entry = self.videos[candidate_id]
+            similarity = float(np.mean(entry['signature'] == signature))
+            same_upload = entry['hash'] == digest or (
+                duration and entry['duration'] and abs(duration - entry['duration']) <= 2
+                and similarity >= self.near_threshold
+            )
+            if same_upload:
+                kind = 'exact'
+            elif similarity >= self.near_threshold:
+                kind = 'near'
+            else:
+                continue
+            rank = (kind == 'exact', similarity)
+            if best is None or rank > (best['kind'] == 'exact', best['similarity']):
+                best = {'video_id': candidate_id, 'kind': kind, 'similarity': similarity}
+        return best
+
+    def clusters(self):
+        """Groups of 2+ videos connected by near-duplicate matches (union-find over LSH candidates)"""
+        parent = {video_id: video_id for video_id in self.videos}
+
+        def find(video_id):
+            while parent[video_id] != video_id:
+                parent[video_id] = parent[parent[video_id]]
+                video_id = parent[video_id]
+            return video_id
+
+        for video_id, entry in self.videos.items():
+            for candidate_id in self.candidates(entry['signature'], exclude=video_id):
+                other = self.videos[candidate_id]
+                if entry['hash'] == other['hash'] or \
+                        np.mean(entry['signature'] == other['signature']) >= self.near_threshold:
+                    parent[find(video_id)] = find(candidate_id)
+
+        groups = {}
+        for video_id in self.videos:
+            groups.setdefault(find(video_id), []).append(video_id)
+        return sorted((sorted(group) for group in groups.values() if len(group) > 1), key=len, reverse=True)
+
+    def _state(self):
+        return {
+            'near_threshold': self.near_threshold,
+            'videos': {
+                video_id: {
+                    'signature': entry['signature'].tolist(),
+                    'hash': entry['hash'],
+                    'duration': entry['duration'],
+                }
+                for video_id, entry in self.videos.items()
+            },
+        }
+
+    def _set_state(self, data):
+        self.videos = {}
+        self.buckets = [{} for _ in range(BANDS)]
+        for video_id, entry in data.get('videos', {}).items():
+            signature = np.array(entry['signature'], dtype=np.uint64)
+            self.videos[video_id] = {'signature': signature, 'hash': entry['hash'], 'duration': entry['duration']}
+            for band, key in enumerate(self._band_keys(signature)):
+                self.buckets[band].setdefault(key, set()).add(video_id)
+
+    def save(self, path):
+        """
+        Write the index atomically, merged with what other processes saved
+        since it was loaded: only the ids added or removed here replace the
+        file's entries, so concurrent workers don't drop each other's videos.
+        """
+        state = self._state()
+        with locked(path):
+            try:
+                with open(path, 'r') as f:
+                    merged = json.load(f).get('videos', {})
+                for video_id in self._changed:
+                    if video_id in state['videos']:
+                        merged[video_id] = state['videos'][video_id]
+                    else:
+                        merged.pop(video_id, None)
+                state['videos'] = merged
+            except FileNotFoundError:
+                pass
+            except (json.JSONDecodeError, IOError) as e:
+                # Unreadable file: what we have in memory is the best copy there is
+                print(f"Near-duplicate index read error, overwriting: {str(e)}")
+            write_json_atomic(path, state)
+        self._set_state(state)
+        self._changed = set()
+
+    @classmethod
+    def load(cls, path, near_threshold=NEAR_THRESHOLD):
+        index = cls(near_threshold)
+        if not os.path.exists(path):
+            return index
+        try:
+            with open(path, 'r') as f:
+                index._set_state(json.load(f))
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Near-duplicate index read error, starting fresh: {str(e)}")
+        return index
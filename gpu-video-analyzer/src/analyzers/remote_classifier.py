@@ -0,0 +1,62 @@
+import logging
+import requests
+from analyzers.gpu_classifier import GPUClassifier
+
+class RemoteGPUClassifier(GPUClassifier):
+    """Client for classifier_server.py with the same is_gpu_related contract as GPUClassifier"""
+
+    def __init__(self, server_url, timeout=120, use_fallback=True):
+        # Deliberately skips GPUClassifier.__init__: the model lives in the daemon
+        self.server_url = server_url.rstrip('/')
+        self.timeout = timeout
+        self.use_llm = False
+        self.use_fallback = use_fallback
+        self.gpu_keywords = GPUClassifier.GPU_KEYWORDS
+        self.session = requests.Session()
+
+    def is_gpu_related(self, title, description=None, transcript=None):
+        """
+        Ask the classifier daemon whether content is GPU-related
+
+        Returns:
+            tuple: (is_gpu_related, confidence_score, reasoning)
+        """
+        try:
+            response = self.session.post(
+                f"{self.server_url}/classify",
+                json={'title': title, 'description': description, 'transcript': transcript},
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            data = response.json()
+            return (data['is_gpu_related'], data['confidence'], data['reasoning'])
+        except Exception as e:
+            logging.error(f"Error calling classifier server at {self.server_url}: {str(e)}")
+            if self.use_fallback:
+                return self._keyword_classification(title)
+            raise e
+
+    def is_gpu_related_batch(self, items):
+        # The daemon already merges concurrent requests into batches
+        return [self.is_gpu_related(item['title'], item.get('description'), item.get('transcript'))
+                for item in items]
+
+def server_is_up(server_url, timeout=2):
+    try:
+        return requests.get(f"{server_url.rstrip('/')}/health", timeout=timeout).ok
+    except requests.RequestException:
+        return False
+
+def load_classifier(classifier_config=None):
+    """
+    Use the resident classifier daemon when one is configured and reachable,
+    otherwise load the model in this process.
+    """
+    classifier_config = classifier_config or {}
+    server_url = classifier_config.get('server_url')
+    if server_url and server_is_up(server_url):
+        logging.info(f"Using classifier server at {server_url}")
+        return RemoteGPUClassifier(server_url)
+    if server_url:
+        logging.warning(f"Classifier server at {server_url} is not reachable, loading model locally")
+    return GPUClassifier(**classifier_config.get('model_kwargs', {}))
@@ -0,0 +1,126 @@
+# classifier_server.py
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from analyzers.gpu_classifier import GPUClassifier
+
+class MicroBatcher:
+    """
+    Merges concurrent classification requests into batches.
+
+    The first request of a batch waits at most `window` seconds for others
+    to arrive (or until `max_batch_size` is reached), then the whole batch
+    goes through GPUClassifier.is_gpu_related_batch in one generate() call.
+    """
+
+    def __init__(self, classifier, max_batch_size=8, window=0.02):
+        self.classifier = classifier
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self.pending = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, item):
+        """Queue one {'title', 'description', 'transcript'} item; returns a Future of the result tuple"""
+        future = Future()
+        self.pending.put((item, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.classifier.is_gpu_related_batch(items)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+def make_handler(batcher):
+    class ClassifierHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok', 'use_llm': batcher.classifier.use_llm})
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/classify':
+                self._send_json(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                item = json.loads(self.rfile.read(length))
+                if not isinstance(item.get('title'), str):
+                    raise ValueError("missing 'title'")
+            except (ValueError, json.JSONDecodeError) as e:
+                self._send_json(400, {'error': str(e)})
+                return
+
+            try:
+                is_gpu_related, confidence, reasoning = batcher.submit(item).result()
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+                return
+            self._send_json(200, {
+                'is_gpu_related': is_gpu_related,
+                'confidence': confidence,
+                'reasoning': reasoning
+            })
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+    return ClassifierHandler
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep GPUClassifier resident and serve it over localhost HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--model', default="deepseek-ai/deepseek-coder-7b-base")
+    parser.add_argument('--max-batch-size', type=int, default=8)
+    parser.add_argument('--batch-window-ms', type=float, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    classifier = GPUClassifier(model_name=args.model)
+    batcher = MicroBatcher(classifier, args.max_batch_size, args.batch_window_ms / 1000)
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(batcher))
+    print(f"Classifier server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
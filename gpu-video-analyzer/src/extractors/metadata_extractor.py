@@ -9,4 +9,15 @@ class MetadataExtractor:
         return {
             'title': title,
             'description': description
+        }
+
+    def extract_metadata_batch(self, video_ids):
+        # One API call per 50 ids instead of one per video
+        videos_details = self.youtube_api.get_videos_details(video_ids)
+        return {
+            video_id: {
+                'title': video_details.get('title'),
+                'description': video_details.get('description')
+            }
+            for video_id, video_details in videos_details.items()
         }
\ No newline at end of file
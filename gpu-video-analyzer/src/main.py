@@ -6,128 +6,22 @@ from extractors.caption_extractor import CaptionExtractor
 from extractors.metadata_extractor import MetadataExtractor
 from analyzers.text_analyzer import TextAnalyzer
 from analyzers.gpu_classifier import GPUClassifier
-from utils.youtube_scraper import *
-
-def load_config():
-    """Load configuration from config.json"""
-    config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
-    with open(config_path, 'r') as f:
-        return json.load(f)
-
-def process_video(video_data):
-    """Process a single video"""
-    try:
-        # Extract metadata from video data
-        video_id = video_data['id']
-        title = video_data['title']
-        description = video_data.get('description', '')
-        
-        # Check if the video is GPU related
-        gpu_classifier = GPUClassifier()
-        is_gpu_related, confidence, explanation = gpu_classifier.is_gpu_related(title, description)
-        
-        result = {
-            'video_id': video_id,
-            'title': title,
-            'is_gpu_related': is_gpu_related,
-            'confidence': confidence,
-            'reasoning': explanation,
-            'url': f"https://youtube.com/watch?v={video_id}"
-        }
-        
-        if is_gpu_related:
-            print(f"📊 GPU-related video found: {title}")
-            
-            # Get transcript
-            try:
-                transcript = get_video_transcript(video_id)
-                if transcript:
-                    max_length = 500
-                    result['transcript_snippet'] = transcript[:max_length] + ('...' if len(transcript) > max_length else '')
-                    result['has_transcript'] = True
-                else:
-                    result['has_transcript'] = False
-            except Exception as e:
-                print(f"Error fetching transcript: {str(e)}")
-                result['has_transcript'] = False
-        else:
-            print(f"⏭️ Skipping non-GPU video: {title}")
-            
-        return result
-    except Exception as e:
-        print(f"Error processing video {video_data.get('id', 'unknown')}: {str(e)}")
-        return None
-
-def main():
-    # Load configuration
-    cleanup()
-    try:
-        config = load_config()
-        output_dir = config.get('output', {}).get('processed_data_path', 'data/processed')
-    except Exception as e:
-        print(f"Error loading config: {str(e)}")
-        output_dir = 'data/processed'
-    
-    # Channel to analyze
-    channel_id = "@geohotarchive"
-    
-    # Get timestamp for videos published in the last year
-    published_after = get_last_year_timestamp()
-    
-    print(f"Fetching videos from {channel_id} published after {published_after}")
-    
-    # Get videos from channel for the last year - limit to 20 to avoid long processing time
-    max_videos = 30
-    videos = get_channel_videos(channel_id, published_after, max_results=max_videos)
-    print(f"Processing {len(videos)} videos (limited to {max_videos} for efficiency)")
-    
-    results = []
-    for i, video in enumerate(videos):
-        print(f"Processing video {i+1}/{len(videos)}: {video.get('title', 'Unknown title')}")
-        result = process_video(video)
-        if result:
-            results.append(result)
-            # Early save of partial results in case of failure
-            if (i+1) % 5 == 0:
-                temp_file = os.path.join(output_dir, f"gpu_videos_partial_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-                os.makedirs(output_dir, exist_ok=True)
-                with open(temp_file, 'w') as f:
-                    json.dump(results, f, indent=2)
-                print(f"Saved partial results to {temp_file}")
-    
-    # Save final results
-    os.makedirs(output_dir, exist_ok=True)
-    
-    output_file = os.path.join(output_dir, f"gpu_videos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
-    
-    print(f"Analysis complete. Results saved to {output_file}")
-    
-    # Print summary
-    gpu_videos = [r for r in results if r['is_gpu_related']]
-    print(f"Summary: Found {len(gpu_videos)} GPU-related videos out of {len(results)} total videos.")
-    
-    if gpu_videos:
-        print("\nGPU-related videos:")
-        for video in gpu_videos:
-            print(f"- {video['title']} ({video['url']})")
-
-if __name__ == "__main__":
-    main()# main.py
-import os
-import json
-from datetime import datetime
-from extractors.caption_extractor import CaptionExtractor
-from extractors.metadata_extractor import MetadataExtractor
-from analyzers.text_analyzer import TextAnalyzer
-from analyzers.gpu_classifier import GPUClassifier
+from analyzers.remote_classifier import load_classifier
+from analyzers.boilerplate import load_channel_boilerplate
+from analyzers.near_duplicates import NearDuplicateIndex
 from utils.youtube_scraper import (
     get_video_details, 
     get_video_transcript,
     get_channel_videos,
-    get_last_year_timestamp
+    get_last_year_timestamp,
+    negative_cache,
+    CACHE_DIR
 )
+from utils.results_store import write_results, read_result_records, configured_dataset_dir
+from utils.youtube_api import load_youtube_api
+
+# Near-duplicate index over every video seen so far (shared by main.py and worker.py)
+DUPLICATES_PATH = os.path.join(CACHE_DIR, 'near_duplicates.json')
 
 def load_config():
     """Load configuration from config.json"""
@@ -135,8 +29,18 @@ def load_config():
     with open(config_path, 'r') as f:
         return json.load(f)
 
-def process_video(video_data):
-    """Process a single video"""
+def apply_cache_config(config):
+    """Negative cache: per-reason TTL overrides, and a switch to retry known absences"""
+    cache_config = config.get('cache', {})
+    negative_cache.ttls.update(cache_config.get('negative_ttl_seconds', {}))
+    negative_cache.force_retry = cache_config.get('force_retry', False)
+
+def process_video(video_data, gpu_classifier=None, cheap=False):
+    """
+    Process a single video. Pass a loaded classifier to reuse it across videos.
+    The description should already have the channel's boilerplate stripped.
+    With cheap=True the video is classified by keywords only (no LLM call).
+    """
     try:
         # Extract metadata from video data
         video_id = video_data['id']
@@ -144,8 +48,12 @@ def process_video(video_data):
         description = video_data.get('description', '')
         
         # Check if the video is GPU related
-        gpu_classifier = GPUClassifier()
-        is_gpu_related, confidence, explanation = gpu_classifier.is_gpu_related(title, description)
+        if gpu_classifier is None:
+            gpu_classifier = load_classifier(load_config().get('classifier'))
+        if cheap:
+            is_gpu_related, confidence, explanation = gpu_classifier.is_gpu_related_cheap(title, description)
+        else:
+            is_gpu_related, confidence, explanation = gpu_classifier.is_gpu_related(title, description)
         
         result = {
             'video_id': video_id,
@@ -153,6 +61,7 @@ def process_video(video_data):
             'is_gpu_related': is_gpu_related,
             'confidence': confidence,
             'reasoning': explanation,
+            'description': description,
             'url': f"https://youtube.com/watch?v={video_id}"
         }
         
@@ -179,14 +88,81 @@ def process_video(video_data):
         print(f"Error processing video {video_data.get('id', 'unknown')}: {str(e)}")
         return None
 
+# Fields of earlier results a re-upload can reuse (plus the id and title for reports)
+REUSED_FIELDS = ('is_gpu_related', 'confidence', 'reasoning', 'has_transcript', 'transcript_snippet')
+PREVIOUS_RESULT_COLUMNS = ['video_id', 'title', 'duplicate_of', 'duplicate_kind'] + list(REUSED_FIELDS)
+
+def reuse_result(previous, video_data, duplicate_of=None):
+    """
+    Result copied from an earlier one: the original video's for an exact
+    re-upload (duplicate_of), or else the video's own from an earlier run.
+    """
+    video_id = video_data['id']
+    result = {key: value for key, value in previous.items() if key in REUSED_FIELDS}
+    result.update({
+        'video_id': video_id,
+        'title': video_data['title'],
+        'description': video_data.get('description', ''),
+        'url': f"https://youtube.com/watch?v={video_id}",
+    })
+    if duplicate_of:
+        result.update({'duplicate_of': duplicate_of, 'duplicate_kind': 'exact'})
+    elif previous.get('duplicate_kind'):
+        result.update({'duplicate_of': previous.get('duplicate_of'), 'duplicate_kind': previous['duplicate_kind']})
+    return result
+
+def has_full_verdict(previous):
+    """Whether an earlier result came from the full classifier (its own or an exact original's), not keywords"""
+    return previous is not None and previous.get('duplicate_kind') != 'near'
+
+def load_previous_results(dataset_dir):
+    """Latest stored result per video, reading only the columns reuse_result needs"""
+    return {record['video_id']: record
+            for record in read_result_records(dataset_dir, columns=PREVIOUS_RESULT_COLUMNS)}
+
+def process_video_deduplicated(video, gpu_classifier, duplicate_index, previous_results):
+    """
+    process_video, after checking earlier results and the near-duplicate
+    index: a video that already has a full verdict of its own keeps it,
+    exact re-uploads reuse the original's verdict, and only near duplicates
+    without a verdict of their own get the keyword classifier.
+    The video is added to the index and its result to previous_results.
+    """
+    own = previous_results.get(video['id'])
+    # The index never matches a video against itself, so check its own earlier verdict first
+    match = None if has_full_verdict(own) else duplicate_index.match(video)
+    if has_full_verdict(own):
+        # Seen in an earlier run: never demote its verdict to the keyword tier
+        print(f"♻️ Already classified {video['id']}, reusing its result")
+        result = reuse_result(own, video)
+    elif match and match['kind'] == 'exact' and match['video_id'] in previous_results:
+        # Re-upload of a video we already classified: reuse its verdict and transcript
+        print(f"♻️ Re-upload of {match['video_id']}, reusing its result")
+        result = reuse_result(previous_results[match['video_id']], video, match['video_id'])
+    elif match:
+        # Near duplicate: the keyword tier is good enough
+        print(f"🔁 Near duplicate of {match['video_id']} ({match['similarity']:.2f}), using keyword classifier")
+        result = process_video(video, gpu_classifier, cheap=True)
+        if result:
+            result['duplicate_of'] = match['video_id']
+            result['duplicate_kind'] = match['kind']
+    else:
+        result = process_video(video, gpu_classifier)
+    duplicate_index.add(video)
+    if result:
+        previous_results[result['video_id']] = result
+    return result
+
 def main():
     # Load configuration
+    config = {}
     try:
         config = load_config()
-        output_dir = config.get('output', {}).get('processed_data_path', 'data/processed')
+        dataset_dir = configured_dataset_dir(config)
+        apply_cache_config(config)
     except Exception as e:
         print(f"Error loading config: {str(e)}")
-        output_dir = 'data/processed'
+        dataset_dir = configured_dataset_dir({})
     
     # Channel to analyze
     channel_id = "@geohotarchive"
@@ -198,31 +174,52 @@ def main():
     
     # Get videos from channel for the last year - limit to 20 to avoid long processing time
     max_videos = 20
-    videos = get_channel_videos(channel_id, published_after, max_results=max_videos)
+    # Batched Data API calls when an API key is configured (falls back to scraping on quota), else scrape
+    youtube_api = load_youtube_api(config.get('youtube_api'))
+    if youtube_api:
+        videos = youtube_api.get_channel_videos(channel_id, published_after, max_results=max_videos)
+    else:
+        videos = get_channel_videos(channel_id, published_after, max_results=max_videos)
     print(f"Processing {len(videos)} videos (limited to {max_videos} for efficiency)")
     
+    # Strip lines the channel repeats in every description (shop/social links, footers)
+    boilerplate = load_channel_boilerplate(CACHE_DIR, channel_id, videos)
+    for video in videos:
+        video['description'] = boilerplate.strip(video.get('description', ''))
+    
+    # Load the classifier once (or connect to the resident classifier server)
+    gpu_classifier = load_classifier(config.get('classifier'))
+    
+    # Near-duplicate index over every video seen so far, and the verdicts we could reuse
+    duplicate_index = NearDuplicateIndex.load(DUPLICATES_PATH)
+    previous_results = load_previous_results(dataset_dir)
+    
     results = []
+    unsaved = []
     for i, video in enumerate(videos):
         print(f"Processing video {i+1}/{len(videos)}: {video.get('title', 'Unknown title')}")
-        result = process_video(video)
+        result = process_video_deduplicated(video, gpu_classifier, duplicate_index, previous_results)
         if result:
             results.append(result)
-            # Early save of partial results in case of failure
+            unsaved.append(result)
+            # Append results to the dataset every few videos in case of failure
             if (i+1) % 5 == 0:
-                temp_file = os.path.join(output_dir, f"gpu_videos_partial_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-                os.makedirs(output_dir, exist_ok=True)
-                with open(temp_file, 'w') as f:
-                    json.dump(results, f, indent=2)
-                print(f"Saved partial results to {temp_file}")
-    
-    # Save final results
-    os.makedirs(output_dir, exist_ok=True)
-    
-    output_file = os.path.join(output_dir, f"gpu_videos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-    with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
-    
-    print(f"Analysis complete. Results saved to {output_file}")
+                write_results(unsaved, dataset_dir, channel_id)
+                print(f"Saved {len(unsaved)} results to {dataset_dir}")
+                unsaved = []
+    
+    # Save the remaining results
+    write_results(unsaved, dataset_dir, channel_id)
+    
+    print(f"Analysis complete. Results saved to {dataset_dir}")
+    
+    duplicate_index.save(DUPLICATES_PATH)
+    clusters = duplicate_index.clusters()
+    if clusters:
+        print(f"\nFound {len(clusters)} duplicate clusters:")
+        for cluster in clusters:
+            titles = [previous_results.get(video_id, {}).get('title') or video_id for video_id in cluster]
+            print(f"- {len(cluster)} videos: " + "; ".join(titles))
     
     # Print summary
     gpu_videos = [r for r in results if r['is_gpu_related']]
@@ -0,0 +1,41 @@
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, merges are best effort
+    fcntl = None
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """
+    Write JSON through a uniquely named temp file in the same directory and
+    rename it over `path`, so readers never see a half-written file and
+    concurrent writers (several workers on one cache) can't clobber each
+    other's temp file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f".{os.path.basename(path)}.",
+                                    suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+@contextmanager
+def locked(path):
+    """Hold an exclusive advisory lock on `path`.lock, for read-merge-write cycles across processes"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,182 @@
+import json
+import os
+import threading
+import time
+from utils.atomic_file import write_json_atomic
+
+# Consecutive failures before a backend's circuit opens
+FAILURE_THRESHOLD = 3
+# How long an open circuit skips its backend before allowing a trial call
+COOLDOWN_SECONDS = 15 * 60
+# Weight of the newest observation in the moving success rate / latency
+EWMA_ALPHA = 0.3
+
+
+class BackendUnavailable(Exception):
+    """Raised by a backend that cannot run at all in this process (e.g. missing package)"""
+
+
+class BackendError(Exception):
+    """Raised by a backend that ran but did not produce a usable result"""
+
+
+class BackendHealth:
+    """
+    Circuit breakers plus success-rate/latency tracking for fallback chains.
+
+    Stats are kept per chain (e.g. "details", "transcript") and per backend,
+    and persisted to a JSON file so a backend that broke in the last run is
+    not retried for every video of the next one.
+    """
+
+    def __init__(self, state_file, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN_SECONDS):
+        self.state_file = state_file
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._disabled = set()
+        # (chain, backend) -> start time of the single trial call a half-open circuit lets through
+        self._trials = {}
+        self._state = self._load()
+
+    def _load(self):
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r') as f:
+                    return json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Backend health read error, starting fresh: {str(e)}")
+        return {}
+
+    def _save(self):
+        try:
+            write_json_atomic(self.state_file, self._state, indent=2)
+        except IOError as e:
+            print(f"Backend health write error: {str(e)}")
+
+    def _stats(self, chain, backend):
+        return self._state.setdefault(chain, {}).setdefault(backend, {
+            'success_rate': 1.0,
+            'latency': None,
+            'consecutive_failures': 0,
+            'opened_at': None,
+        })
+
+    def is_open(self, chain, backend, now=None):
+        """True while the backend's circuit is open and still cooling down"""
+        stats = self._state.get(chain, {}).get(backend)
+        if not stats or stats['opened_at'] is None:
+            return False
+        now = now if now is not None else time.time()
+        return now - stats['opened_at'] < self.cooldown
+
+    def _is_half_open(self, chain, backend):
+        stats = self._state.get(chain, {}).get(backend)
+        return bool(stats) and stats['opened_at'] is not None
+
+    def acquire_trial(self, chain, backend, now=None):
+        """
+        Claim the right to call a backend. Always granted while its circuit is
+        closed; once the cooldown of an open circuit has passed, only one caller
+        at a time gets the trial call and the others keep skipping the backend
+        until it reports back (or the trial itself has been out for a cooldown).
+        """
+        with self._lock:
+            now = now if now is not None else time.time()
+            if backend in self._disabled or self.is_open(chain, backend, now):
+                return False
+            if not self._is_half_open(chain, backend):
+                return True
+            started = self._trials.get((chain, backend))
+            if started is not None and now - started < self.cooldown:
+                return False
+            self._trials[(chain, backend)] = now
+            return True
+
+    def order(self, chain, backends):
+        """
+        Return the backends worth trying, best first.
+
+        Backends with an open circuit (or disabled for this run) are skipped,
+        as are half-open ones whose trial call another thread already holds.
+        The rest are sorted by success rate, then by latency, keeping the
+        declared order as the tie-breaker so an untried chain runs as written.
+        """
+        with self._lock:
+            now = time.time()
+            candidates = []
+            for index, backend in enumerate(backends):
+                if backend in self._disabled or self.is_open(chain, backend, now):
+                    continue
+                if (chain, backend) in self._trials and self._is_half_open(chain, backend):
+                    continue
+                stats = self._state.get(chain, {}).get(backend, {})
+                rate = round(stats.get('success_rate', 1.0), 1)
+                latency = stats.get('latency')
+                candidates.append((-rate, latency if latency is not None else float('inf'), index, backend))
+            return [backend for *_, backend in sorted(candidates)]
+
+    def record_success(self, chain, backend, latency):
+        with self._lock:
+            self._trials.pop((chain, backend), None)
+            stats = self._stats(chain, backend)
+            stats['success_rate'] = EWMA_ALPHA + (1 - EWMA_ALPHA) * stats['success_rate']
+            stats['latency'] = latency if stats['latency'] is None else \
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * stats['latency']
+            stats['consecutive_failures'] = 0
+            stats['opened_at'] = None
+            self._save()
+
+    def record_failure(self, chain, backend, latency):
+        with self._lock:
+            self._trials.pop((chain, backend), None)
+            stats = self._stats(chain, backend)
+            stats['success_rate'] = (1 - EWMA_ALPHA) * stats['success_rate']
+            stats['latency'] = latency if stats['latency'] is None else \
+                EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * stats['latency']
+            stats['consecutive_failures'] += 1
+            # A failed trial call after the cooldown re-opens the circuit immediately
+            if stats['consecutive_failures'] >= self.failure_threshold:
+                if stats['opened_at'] is None:
+                    print(f"Circuit opened for {chain} backend '{backend}' after "
+                          f"{stats['consecutive_failures']} consecutive failures")
+                stats['opened_at'] = time.time()
+            self._save()
+
+    def disable(self, backend):
+        """Skip a backend for the rest of this run without touching persisted stats"""
+        with self._lock:
+            self._disabled.add(backend)
+            for key in [key for key in self._trials if key[1] == backend]:
+                del self._trials[key]
+
+    def call(self, chain, backends, *args, stop_on=()):
+        """
+        Run a fallback chain. `backends` maps name -> callable in preferred order.
+
+        A backend succeeds by returning and fails by raising. Exceptions listed
+        in `stop_on` are definitive answers ("no captions", "video is private"):
+        they count as a success for the backend and are re-raised to the caller
+        instead of falling through. Returns the first successful value, or None
+        if every backend failed or was skipped.
+        """
+        for name in self.order(chain, list(backends)):
+            # Another thread may have taken the half-open trial since order() ran
+            if not self.acquire_trial(chain, name):
+                continue
+            start = time.time()
+            try:
+                result = backends[name](*args)
+            except BackendUnavailable:
+                self.disable(name)
+                continue
+            except stop_on:
+                self.record_success(chain, name, time.time() - start)
+                raise
+            except Exception as e:
+                print(f"{chain} backend '{name}' failed for {args[0] if args else ''}: {str(e)}")
+                self.record_failure(chain, name, time.time() - start)
+                continue
+            self.record_success(chain, name, time.time() - start)
+            return result
+        return None
@@ -0,0 +1,134 @@
+import html
+import json
+import random
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from utils.backend_health import BackendError
+from utils.negative_cache import NegativeResult
+
+WATCH_URL = "https://www.youtube.com/watch?v={video_id}"
+
+# Chunk size for streaming timed-text responses into the parser
+CHUNK_SIZE = 16 * 1024
+
+def _make_session(user_agents):
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': random.choice(user_agents),
+        'Accept-Language': 'en-US,en;q=0.9',
+    })
+    # Skip the EU cookie-consent interstitial, which has no player response
+    session.cookies.set('CONSENT', 'YES+cb', domain='.youtube.com')
+    return session
+
+def extract_player_response(page_html):
+    """Pull the ytInitialPlayerResponse JSON object out of a watch page"""
+    match = re.search(r'ytInitialPlayerResponse\s*=\s*\{', page_html)
+    if not match:
+        return None
+    try:
+        player_response, _ = json.JSONDecoder().raw_decode(page_html, match.end() - 1)
+    except json.JSONDecodeError:
+        return None
+    return player_response
+
+def extract_caption_tracks(player_response):
+    """
+    Return the caption tracks listed in a player response.
+    Raises NegativeResult when the video is private, unavailable or has no
+    captions, and BackendError when YouTube wants a login for another reason.
+    """
+    status = player_response.get('playabilityStatus', {})
+    if status.get('status') == 'LOGIN_REQUIRED':
+        reason = status.get('reason', '')
+        if 'private' in reason.lower():
+            raise NegativeResult('private', reason)
+        # Bot checks and age gates also ask for a login; another backend may still get through
+        raise BackendError(f"login required: {reason}")
+    if status.get('status') in ('ERROR', 'UNPLAYABLE'):
+        raise NegativeResult('unavailable', status.get('reason', ''))
+
+    tracks = (player_response.get('captions', {})
+              .get('playerCaptionsTracklistRenderer', {})
+              .get('captionTracks', []))
+    if not tracks:
+        raise NegativeResult('no_captions')
+    return tracks
+
+def choose_caption_track(tracks):
+    """Prefer manual English, then auto-generated English, then whatever comes first"""
+    english = [track for track in tracks if track.get('languageCode', '').split('-')[0] == 'en']
+    for track in english:
+        if track.get('kind') != 'asr':
+            return track
+    if english:
+        return english[0]
+    return tracks[0] if tracks else None
+
+def iter_timed_text(chunks):
+    """
+    Incrementally parse a timed-text XML document into segments.
+
+    Understands both the legacy format (<transcript><text start dur>) and
+    srv3 (<timedtext><body><p t d><s>...</s></p>). Elements are dropped as
+    soon as they are parsed, so memory stays flat however long the video is.
+
+    Yields:
+        dict: {'start': seconds, 'duration': seconds, 'text': str}
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from _drain_segments(parser)
+    parser.close()
+    yield from _drain_segments(parser)
+
+def _drain_segments(parser):
+    for _, elem in parser.read_events():
+        if elem.tag == 'text':
+            start = float(elem.get('start', 0))
+            duration = float(elem.get('dur', 0))
+        elif elem.tag == 'p':
+            # srv3 timings are in milliseconds
+            start = int(elem.get('t', 0)) / 1000
+            duration = int(elem.get('d', 0)) / 1000
+        else:
+            continue
+        # Legacy tracks escape entities twice (&amp;#39;), so unescape what the parser left
+        text = html.unescape(''.join(elem.itertext()))
+        text = re.sub(r'\s+', ' ', text).strip()
+        elem.clear()
+        if text:
+            yield {'start': start, 'duration': duration, 'text': text}
+
+def fetch_caption_segments(video_id, user_agents, timeout=15):
+    """
+    Find the best caption track on the watch page and stream its segments,
+    using plain HTTP only (no browser, no pytube).
+    """
+    session = _make_session(user_agents)
+    response = session.get(WATCH_URL.format(video_id=video_id), timeout=timeout)
+    response.raise_for_status()
+
+    player_response = extract_player_response(response.text)
+    if player_response is None:
+        raise ValueError("no ytInitialPlayerResponse on the watch page")
+
+    track = choose_caption_track(extract_caption_tracks(player_response))
+    # Ask for srv3 explicitly: it has per-segment timings and no nested escaping
+    parts = urlsplit(track['baseUrl'])
+    query = [(key, value) for key, value in parse_qsl(parts.query) if key != 'fmt'] + [('fmt', 'srv3')]
+    url = urlunsplit(parts._replace(query=urlencode(query)))
+
+    with session.get(url, timeout=timeout, stream=True) as captions:
+        captions.raise_for_status()
+        yield from iter_timed_text(captions.iter_content(chunk_size=CHUNK_SIZE))
+
+def fetch_transcript(video_id, user_agents, timeout=15):
+    """Transcript text from the best caption track, or NegativeResult('no_captions')"""
+    transcript = " ".join(segment['text'] for segment in fetch_caption_segments(video_id, user_agents, timeout))
+    if not transcript:
+        raise NegativeResult('no_captions', 'caption track was empty')
+    return transcript
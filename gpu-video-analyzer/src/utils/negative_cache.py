@@ -0,0 +1,74 @@
+import json
+import os
+import time
+
+# How long (seconds) each kind of negative outcome is trusted before we look again
+NEGATIVE_TTLS = {
+    'no_captions': 7 * 24 * 3600,      # Captions rarely appear after the first week
+    'private': 3 * 24 * 3600,          # Archive uploads are sometimes made public later
+    'unavailable': 30 * 24 * 3600,     # Removed / blocked videos almost never come back
+    'transient_error': 3600,           # Every backend failed; likely network or rate limiting
+}
+
+
+class NegativeResult(Exception):
+    """Raised by a backend that worked but found nothing to return (e.g. no captions)"""
+
+    def __init__(self, reason, detail=''):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+        self.detail = detail
+
+
+class NegativeCache:
+    """
+    Remembers failed lookups so repeated runs don't re-discover the same absences.
+
+    Entries live next to the positive cache as {video_id}_{kind}_negative.json
+    and expire after the TTL configured for their reason code.
+    """
+
+    def __init__(self, cache_dir, ttls=None):
+        self.cache_dir = cache_dir
+        self.ttls = dict(NEGATIVE_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        # When set, negative entries are ignored (but still overwritten on new failures)
+        self.force_retry = False
+
+    def _path(self, video_id, kind):
+        return os.path.join(self.cache_dir, f"{video_id}_{kind}_negative.json")
+
+    def get(self, video_id, kind):
+        """Return the cached entry ({'reason', 'detail', 'recorded_at'}) if still fresh, else None"""
+        if self.force_retry:
+            return None
+        path = self._path(video_id, kind)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r') as f:
+                entry = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return None
+        ttl = self.ttls.get(entry.get('reason'), 0)
+        if time.time() - entry.get('recorded_at', 0) >= ttl:
+            return None
+        return entry
+
+    def put(self, video_id, kind, reason, detail=''):
+        entry = {
+            'reason': reason,
+            'detail': detail,
+            'recorded_at': time.time(),
+        }
+        try:
+            with open(self._path(video_id, kind), 'w') as f:
+                json.dump(entry, f)
+        except IOError as e:
+            print(f"Negative cache write error for {video_id}: {str(e)}")
+
+    def clear(self, video_id, kind):
+        path = self._path(video_id, kind)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,157 @@
+import os
+import re
+import glob
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# Fixed schema for every results file; 'date' is the hive partition key (date=YYYY-MM-DD)
+RESULTS_SCHEMA = pa.schema([
+    ('video_id', pa.string()),
+    ('channel', pa.string()),
+    ('title', pa.string()),
+    ('description', pa.string()),
+    ('is_gpu_related', pa.bool_()),
+    ('confidence', pa.float64()),
+    ('reasoning', pa.string()),
+    ('url', pa.string()),
+    ('has_transcript', pa.bool_()),
+    ('transcript_snippet', pa.string()),
+    ('duplicate_of', pa.string()),
+    ('duplicate_kind', pa.string()),
+    ('processed_at', pa.timestamp('us', tz='UTC')),
+    ('date', pa.string()),
+])
+
+PARTITIONING = ds.partitioning(pa.schema([('date', pa.string())]), flavor='hive')
+
+def configured_dataset_dir(config):
+    """The dataset location from config.json's output section (default: <processed_data_path>/results)"""
+    output_config = config.get('output', {})
+    output_dir = output_config.get('processed_data_path', 'data/processed')
+    return output_config.get('dataset_path', os.path.join(output_dir, 'results'))
+
+def _to_table(results, channel=None, processed_at=None):
+    processed_at = processed_at or datetime.now(timezone.utc)
+    frame = pd.DataFrame(results, columns=[field.name for field in RESULTS_SCHEMA])
+    frame['channel'] = frame['channel'].fillna(channel) if channel else frame['channel']
+    # Results that carry their own processed_at (e.g. queue ack times) keep it
+    frame['processed_at'] = pd.to_datetime(frame['processed_at'], utc=True).fillna(pd.Timestamp(processed_at))
+    frame['date'] = frame['processed_at'].dt.strftime('%Y-%m-%d')
+    # Object columns with missing values must be real None for arrow's bool/string casts
+    frame = frame.astype(object).where(frame.notna(), None)
+    return pa.Table.from_pandas(frame, schema=RESULTS_SCHEMA, preserve_index=False)
+
+def write_results(results, dataset_dir, channel=None, processed_at=None):
+    """
+    Append a batch of process_video results to the date-partitioned Parquet dataset.
+    Each call writes new files, so batches from concurrent runs never overwrite each other.
+    Rows without a processed_at of their own are stamped with `processed_at` (default: now).
+    """
+    if not results:
+        return
+    table = _to_table(results, channel, processed_at)
+    ds.write_dataset(
+        table,
+        dataset_dir,
+        format='parquet',
+        partitioning=PARTITIONING,
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+    )
+
+def dataset_files(dataset_dir):
+    """Paths (relative to dataset_dir) of every Parquet file in the dataset"""
+    paths = glob.glob(os.path.join(dataset_dir, '**', '*.parquet'), recursive=True)
+    return sorted(os.path.relpath(path, dataset_dir) for path in paths)
+
+def read_results(dataset_dir, columns=None, gpu_only=False, min_confidence=None, since_days=None,
+                 channel=None, latest_only=True, files=None):
+    """
+    Read results with column projection and predicate pushdown.
+
+    Filters on `date` prune whole partitions; the rest are pushed into the
+    Parquet reader, so only matching row groups and requested columns are
+    decoded. With latest_only, a video processed in several runs is
+    returned once, from its most recent run, and the verdict filters
+    (gpu_only, min_confidence, channel) apply to that run only: they are
+    evaluated after deduplication, so an older run can't stand in for a
+    newer verdict that doesn't match. files (paths from dataset_files)
+    restricts the read to those files, for incremental readers.
+
+    Returns:
+        pandas.DataFrame
+    """
+    if not os.path.isdir(dataset_dir) or files is not None and not files:
+        return pd.DataFrame(columns=columns or [field.name for field in RESULTS_SCHEMA])
+
+    if files is None:
+        dataset = ds.dataset(dataset_dir, schema=RESULTS_SCHEMA, format='parquet', partitioning=PARTITIONING)
+    else:
+        dataset = ds.dataset([os.path.join(dataset_dir, path) for path in files], schema=RESULTS_SCHEMA,
+                             format='parquet', partitioning=PARTITIONING, partition_base_dir=dataset_dir)
+
+    verdict_filters = []
+    if gpu_only:
+        verdict_filters.append(('is_gpu_related', ds.field('is_gpu_related') == True,
+                                lambda frame: frame['is_gpu_related'] == True))
+    if min_confidence is not None:
+        verdict_filters.append(('confidence', ds.field('confidence') > min_confidence,
+                                lambda frame: frame['confidence'] > min_confidence))
+    if channel:
+        verdict_filters.append(('channel', ds.field('channel') == channel,
+                                lambda frame: frame['channel'] == channel))
+
+    conditions = []
+    if since_days is not None:
+        since = datetime.now(timezone.utc) - timedelta(days=since_days)
+        conditions.append(ds.field('date') >= since.strftime('%Y-%m-%d'))
+        conditions.append(ds.field('processed_at') >= pa.scalar(since, type=pa.timestamp('us', tz='UTC')))
+    if not latest_only:
+        conditions.extend(condition for _, condition, _ in verdict_filters)
+
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+
+    read_columns = None
+    if columns is not None:
+        # Deduplication needs the key and timestamp, and the post-dedup filters their
+        # columns, even if the caller didn't ask for them
+        extra = ['video_id', 'processed_at'] + [column for column, _, _ in verdict_filters] if latest_only else []
+        read_columns = list(dict.fromkeys(list(columns) + extra))
+
+    frame = dataset.to_table(columns=read_columns, filter=expression).to_pandas()
+    if latest_only and not frame.empty:
+        frame = frame.sort_values('processed_at').drop_duplicates('video_id', keep='last')
+        for _, _, keep in verdict_filters:
+            frame = frame[keep(frame)]
+    if columns is not None:
+        frame = frame[list(columns)]
+    return frame.reset_index(drop=True)
+
+def read_result_records(dataset_dir, columns=None, **filters):
+    """read_results as a list of dicts; missing values are left out, as in process_video results"""
+    frame = read_results(dataset_dir, columns=columns, **filters)
+    return [{key: value for key, value in record.items() if pd.notna(value)}
+            for record in frame.to_dict('records')]
+
+def import_json_results(results_dir, dataset_dir, channel=None):
+    """
+    One-off migration of the old gpu_videos_<timestamp>.json dumps into the dataset.
+    Partial dumps are skipped since every one of them is a prefix of a final dump.
+    """
+    imported = 0
+    for path in sorted(glob.glob(os.path.join(results_dir, "gpu_videos_*.json"))):
+        match = re.search(r'gpu_videos_(\d{8}_\d{6})\.json$', path)
+        if not match:
+            continue
+        with open(path, 'r') as f:
+            results = json.load(f)
+        processed_at = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S').replace(tzinfo=timezone.utc)
+        write_results(results, dataset_dir, channel, processed_at)
+        imported += len(results)
+    return imported
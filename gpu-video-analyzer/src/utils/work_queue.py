@@ -0,0 +1,366 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+# Seconds a worker may hold an item before it is handed to someone else
+LEASE_SECONDS = 600
+# Attempts (including crashed leases) before an item is parked as failed
+MAX_ATTEMPTS = 3
+
+
+def _tagged_result(raw_result, channel, acked_at):
+    """A stored result with its queue channel and ack time (as processed_at) attached"""
+    result = dict(json.loads(raw_result) if isinstance(raw_result, str) else raw_result, channel=channel)
+    if acked_at is not None:
+        result['processed_at'] = datetime.fromtimestamp(float(acked_at), timezone.utc)
+    return result
+
+
+class SQLiteWorkQueue:
+    """
+    Durable video_id queue in a local SQLite file.
+
+    Workers lease items, process them and ack the result. A lease that is not
+    acked before it expires (crashed or killed worker) is handed out again.
+    Good for any number of processes on one host, or on hosts sharing the file
+    over a filesystem with working POSIX locks; use RedisWorkQueue otherwise.
+    """
+
+    def __init__(self, path, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Autocommit mode; multi-statement updates use explicit BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_items (
+                video_id TEXT PRIMARY KEY,
+                channel TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_id TEXT,
+                lease_expires REAL,
+                result TEXT,
+                error TEXT,
+                enqueued_at REAL,
+                updated_at REAL,
+                acked_at REAL,
+                collected_at REAL
+            )
+        """)
+        # Queues created before ack/collect times were tracked
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(work_items)")}
+        for column in ('acked_at', 'collected_at'):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE work_items ADD COLUMN {column} REAL")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_work_items_status ON work_items (status, enqueued_at)")
+
+    def enqueue(self, channel, video_ids, requeue=False):
+        """Add video_ids for a channel. Already-known ids are left alone unless requeue=True."""
+        now = time.time()
+        verb = "INSERT OR REPLACE" if requeue else "INSERT OR IGNORE"
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = self.conn.executemany(
+                f"{verb} INTO work_items (video_id, channel, status, enqueued_at, updated_at) "
+                "VALUES (?, ?, 'pending', ?, ?)",
+                [(video_id, channel, now, now) for video_id in video_ids]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return cursor.rowcount
+
+    def lease(self, worker_id):
+        """Claim the oldest available item. Returns {'video_id', 'channel', 'attempts'} or None."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Items whose lease ran out on their final attempt are parked, not retried forever
+            self.conn.execute(
+                "UPDATE work_items SET status = 'failed', error = 'lease expired', updated_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts)
+            )
+            row = self.conn.execute(
+                "SELECT video_id, channel, attempts FROM work_items "
+                "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "ORDER BY enqueued_at LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                self.conn.execute("COMMIT")
+                return None
+            self.conn.execute(
+                "UPDATE work_items SET status = 'leased', worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE video_id = ?",
+                (worker_id, now + self.lease_seconds, now, row[0])
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+        return {'video_id': row[0], 'channel': row[1], 'attempts': row[2] + 1}
+
+    def ack(self, video_id, worker_id, result):
+        """Store the result for a leased item. Returns False if the lease was lost meanwhile."""
+        now = time.time()
+        cursor = self.conn.execute(
+            "UPDATE work_items SET status = 'done', result = ?, error = NULL, lease_expires = NULL, "
+            "updated_at = ?, acked_at = ?, collected_at = NULL "
+            "WHERE video_id = ? AND worker_id = ? AND status = 'leased'",
+            (json.dumps(result), now, now, video_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, video_id, worker_id, error):
+        """Give a leased item back; it is retried until it runs out of attempts."""
+        cursor = self.conn.execute(
+            "UPDATE work_items SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "error = ?, lease_expires = NULL, updated_at = ? "
+            "WHERE video_id = ? AND worker_id = ? AND status = 'leased'",
+            (self.max_attempts, str(error), time.time(), video_id, worker_id)
+        )
+        return cursor.rowcount == 1
+
+    def results(self, channel=None, include_collected=False):
+        """
+        Acked results in enqueue order, each tagged with the channel it was
+        queued for and its ack time as processed_at. Results already marked
+        collected are left out unless include_collected is set.
+        """
+        query = "SELECT result, channel, acked_at FROM work_items WHERE status = 'done'"
+        params = []
+        if channel:
+            query += " AND channel = ?"
+            params.append(channel)
+        if not include_collected:
+            query += " AND collected_at IS NULL"
+        rows = self.conn.execute(query + " ORDER BY enqueued_at", params).fetchall()
+        return [_tagged_result(result, item_channel, acked_at)
+                for result, item_channel, acked_at in rows if result != 'null']
+
+    def mark_collected(self, video_ids):
+        """Record that these results were written to the dataset, so collect skips them next time"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(
+                "UPDATE work_items SET collected_at = ? WHERE video_id = ? AND status = 'done'",
+                [(time.time(), video_id) for video_id in video_ids]
+            )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+    def stats(self):
+        """Item counts per status, e.g. {'pending': 3, 'leased': 1, 'done': 20}"""
+        now = time.time()
+        rows = self.conn.execute(
+            "SELECT CASE WHEN status = 'leased' AND lease_expires < ? THEN 'expired' ELSE status END, "
+            "COUNT(*) FROM work_items GROUP BY 1",
+            (now,)
+        ).fetchall()
+        return dict(rows)
+
+
+# Every state change on the Redis queue is one Lua script, so a worker dying
+# between two commands can't leave an item in neither the pending list nor the
+# lease zset. KEYS are always: pending, leases, items, results.
+_REDIS_ENQUEUE = """
+local added = 0
+local requeue = ARGV[2] == '1'
+for i = 3, #ARGV do
+    local video_id = ARGV[i]
+    local item = cjson.encode({channel = ARGV[1], status = 'pending', attempts = 0})
+    if requeue then
+        redis.call('HDEL', KEYS[4], video_id)
+        redis.call('ZREM', KEYS[2], video_id)
+        redis.call('LREM', KEYS[1], 0, video_id)
+        redis.call('HSET', KEYS[3], video_id, item)
+        redis.call('RPUSH', KEYS[1], video_id)
+        added = added + 1
+    elseif redis.call('HSETNX', KEYS[3], video_id, item) == 1 then
+        redis.call('RPUSH', KEYS[1], video_id)
+        added = added + 1
+    end
+end
+return added
+"""
+
+_REDIS_LEASE = """
+local now = tonumber(ARGV[1])
+local max_attempts = tonumber(ARGV[4])
+for _, video_id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], 0, now)) do
+    redis.call('ZREM', KEYS[2], video_id)
+    local raw = redis.call('HGET', KEYS[3], video_id)
+    if raw then
+        local item = cjson.decode(raw)
+        if item.attempts >= max_attempts then
+            item.status = 'failed'
+            item.error = 'lease expired'
+        else
+            item.status = 'pending'
+            redis.call('RPUSH', KEYS[1], video_id)
+        end
+        redis.call('HSET', KEYS[3], video_id, cjson.encode(item))
+    end
+end
+local video_id = redis.call('LPOP', KEYS[1])
+if not video_id then
+    return false
+end
+local item = cjson.decode(redis.call('HGET', KEYS[3], video_id))
+item.status = 'leased'
+item.worker_id = ARGV[2]
+item.attempts = item.attempts + 1
+redis.call('HSET', KEYS[3], video_id, cjson.encode(item))
+redis.call('ZADD', KEYS[2], now + tonumber(ARGV[3]), video_id)
+return {video_id, item.channel or '', item.attempts}
+"""
+
+_REDIS_FINISH = """
+local raw = redis.call('HGET', KEYS[3], ARGV[1])
+if not raw then
+    return 0
+end
+local item = cjson.decode(raw)
+if item.worker_id ~= ARGV[2] or item.status ~= 'leased' then
+    return 0
+end
+redis.call('ZREM', KEYS[2], ARGV[1])
+if ARGV[3] == 'ack' then
+    redis.call('HSET', KEYS[4], ARGV[1], ARGV[4])
+    item.status = 'done'
+    item.error = nil
+    item.acked_at = tonumber(ARGV[5])
+    item.collected = nil
+else
+    item.error = ARGV[4]
+    if item.attempts >= tonumber(ARGV[5]) then
+        item.status = 'failed'
+    else
+        item.status = 'pending'
+        redis.call('RPUSH', KEYS[1], ARGV[1])
+    end
+end
+redis.call('HSET', KEYS[3], ARGV[1], cjson.encode(item))
+return 1
+"""
+
+_REDIS_MARK_COLLECTED = """
+for i = 1, #ARGV do
+    local raw = redis.call('HGET', KEYS[3], ARGV[i])
+    if raw then
+        local item = cjson.decode(raw)
+        if item.status == 'done' then
+            item.collected = true
+            redis.call('HSET', KEYS[3], ARGV[i], cjson.encode(item))
+        end
+    end
+end
+return 1
+"""
+
+
+class RedisWorkQueue:
+    """
+    The same lease/ack queue on a Redis-compatible server, for workers on
+    hosts that don't share a filesystem. Needs the optional `redis` package
+    and a server with Lua scripting (EVAL).
+
+    Keys (under `prefix`): pending (list of ids), leases (zset id -> expiry),
+    items (hash id -> JSON state) and results (hash id -> JSON result).
+    """
+
+    def __init__(self, url, prefix='gpu_videos', lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS,
+                 client=None):
+        if client is None:
+            try:
+                import redis
+            except ImportError:
+                raise ImportError("RedisWorkQueue requires the 'redis' package (pip install redis)")
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._enqueue_script = self.client.register_script(_REDIS_ENQUEUE)
+        self._lease_script = self.client.register_script(_REDIS_LEASE)
+        self._finish_script = self.client.register_script(_REDIS_FINISH)
+        self._mark_collected_script = self.client.register_script(_REDIS_MARK_COLLECTED)
+
+    def _key(self, name):
+        return f"{self.prefix}:{name}"
+
+    def _keys(self):
+        return [self._key('pending'), self._key('leases'), self._key('items'), self._key('results')]
+
+    def _item(self, video_id):
+        raw = self.client.hget(self._key('items'), video_id)
+        return json.loads(raw) if raw else None
+
+    def enqueue(self, channel, video_ids, requeue=False):
+        video_ids = list(video_ids)
+        if not video_ids:
+            return 0
+        return int(self._enqueue_script(keys=self._keys(), args=[channel or '', int(requeue)] + video_ids))
+
+    def lease(self, worker_id):
+        leased = self._lease_script(keys=self._keys(),
+                                    args=[time.time(), worker_id, self.lease_seconds, self.max_attempts])
+        if not leased:
+            return None
+        video_id, channel, attempts = leased
+        return {'video_id': video_id, 'channel': channel or None, 'attempts': int(attempts)}
+
+    def ack(self, video_id, worker_id, result):
+        return self._finish_script(keys=self._keys(),
+                                   args=[video_id, worker_id, 'ack', json.dumps(result), time.time()]) == 1
+
+    def fail(self, video_id, worker_id, error):
+        return self._finish_script(keys=self._keys(),
+                                   args=[video_id, worker_id, 'fail', str(error), self.max_attempts]) == 1
+
+    def results(self, channel=None, include_collected=False):
+        results = []
+        for video_id, raw in self.client.hgetall(self._key('results')).items():
+            result = json.loads(raw)
+            if result is None:
+                continue
+            item = self._item(video_id) or {}
+            item_channel = item.get('channel') or None
+            if channel and item_channel != channel:
+                continue
+            if item.get('collected') and not include_collected:
+                continue
+            results.append(_tagged_result(result, item_channel, item.get('acked_at')))
+        return results
+
+    def mark_collected(self, video_ids):
+        video_ids = list(video_ids)
+        if video_ids:
+            self._mark_collected_script(keys=self._keys(), args=video_ids)
+
+    def stats(self):
+        counts = {}
+        for raw in self.client.hvals(self._key('items')):
+            status = json.loads(raw)['status']
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+
+def open_work_queue(queue_config):
+    """Build a queue from the "queue" section of config.json"""
+    lease_seconds = queue_config.get('lease_seconds', LEASE_SECONDS)
+    max_attempts = queue_config.get('max_attempts', MAX_ATTEMPTS)
+    if queue_config.get('redis_url'):
+        return RedisWorkQueue(queue_config['redis_url'], queue_config.get('redis_prefix', 'gpu_videos'),
+                              lease_seconds, max_attempts)
+    return SQLiteWorkQueue(queue_config.get('path', 'data/work_queue.sqlite'), lease_seconds, max_attempts)
@@ -0,0 +1,311 @@
+import os
+import re
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import httplib2
+from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
+from utils.youtube_scraper import (
+    CACHE_DIR,
+    negative_cache,
+    get_channel_video_ids as scrape_channel_video_ids,
+    get_video_details as scrape_video_details,
+    get_video_transcript
+)
+
+# Units charged per call by the YouTube Data API v3
+QUOTA_COSTS = {
+    'channels.list': 1,
+    'playlistItems.list': 1,
+    'videos.list': 1,
+}
+DAILY_QUOTA = 10000
+# videos.list and playlistItems.list accept at most 50 ids / results per call
+MAX_BATCH = 50
+# Short-term rate limiting is retried this many times, waiting RATE_LIMIT_BACKOFF * 2^n seconds
+RATE_LIMIT_RETRIES = 4
+RATE_LIMIT_BACKOFF = 1.0
+# Parallel page loads when falling back to the scraper, as in get_channel_videos_parallel
+SCRAPE_WORKERS = 4
+
+# Error reasons meaning today's quota is gone, vs. "slow down" (which clears within seconds)
+QUOTA_REASONS = ('quotaExceeded', 'dailyLimitExceeded')
+RATE_LIMIT_REASONS = ('rateLimitExceeded', 'userRateLimitExceeded')
+# Failures of a single call (HTTP errors, bad key, network) that the scraper can stand in for
+API_ERRORS = (HttpError, httplib2.HttpLib2Error, OSError)
+
+class QuotaExceeded(Exception):
+    """Raised when a call would go over today's API quota"""
+
+class QuotaAccountant:
+    """
+    Tracks API units spent today and refuses calls that would exceed the quota.
+    Usage is persisted so separate runs on the same day share one budget.
+    The quota resets at midnight Pacific time, like Google's.
+    """
+
+    def __init__(self, state_file, daily_quota=DAILY_QUOTA):
+        self.state_file = state_file
+        self.daily_quota = daily_quota
+        self._lock = threading.Lock()
+        self.day, self.used = self._load()
+
+    @staticmethod
+    def _today():
+        return datetime.now(ZoneInfo('America/Los_Angeles')).strftime('%Y-%m-%d')
+
+    def _load(self):
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r') as f:
+                    state = json.load(f)
+                return state['day'], state['used']
+        except (json.JSONDecodeError, IOError, KeyError) as e:
+            print(f"Quota state read error, starting from zero: {str(e)}")
+        return self._today(), 0
+
+    def _save(self):
+        try:
+            with open(self.state_file, 'w') as f:
+                json.dump({'day': self.day, 'used': self.used}, f)
+        except IOError as e:
+            print(f"Quota state write error: {str(e)}")
+
+    def _roll_over(self):
+        today = self._today()
+        if today != self.day:
+            self.day, self.used = today, 0
+
+    @property
+    def remaining(self):
+        with self._lock:
+            self._roll_over()
+            return self.daily_quota - self.used
+
+    def charge(self, method):
+        with self._lock:
+            self._roll_over()
+            cost = QUOTA_COSTS[method]
+            if self.used + cost > self.daily_quota:
+                raise QuotaExceeded(f"{method} needs {cost} units, {self.daily_quota - self.used} left today")
+            self.used += cost
+            self._save()
+
+    def exhaust(self):
+        """The API said we're out (e.g. the key is shared with another tool): stop until tomorrow"""
+        with self._lock:
+            self._roll_over()
+            self.used = self.daily_quota
+            self._save()
+
+def parse_duration(duration):
+    """ISO 8601 duration from contentDetails (e.g. 'PT1H2M3S') to seconds"""
+    match = re.match(r'P(?:(\d+)D)?T?(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?', duration or '')
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+def error_reason(error):
+    """The 'reason' of an API HttpError (e.g. 'quotaExceeded'), or None"""
+    try:
+        errors = json.loads(error.content.decode('utf-8', 'replace'))['error'].get('errors', [])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    return errors[0].get('reason') if errors else None
+
+class YouTubeDataAPI:
+    """
+    YouTube Data API v3 source for MetadataExtractor / CaptionExtractor.
+
+    Video details are fetched 50 ids per videos.list call and channel
+    listings page through the uploads playlist 50 items at a time, so
+    1,000 videos cost about 20 requests + 20 quota units instead of 1,000
+    page loads. Results go into the same cache files the scraper uses.
+    When the quota runs out, every method falls back to the scraper for the
+    rest of the work; any other failed call (HTTP error, network) falls back
+    for just that batch.
+    """
+
+    def __init__(self, api_key, quota=None, service=None, fallback=True, backoff=RATE_LIMIT_BACKOFF):
+        self.service = service or build('youtube', 'v3', developerKey=api_key, cache_discovery=False)
+        self.quota = quota or QuotaAccountant(os.path.join(CACHE_DIR, 'api_quota.json'))
+        self.fallback = fallback
+        self.backoff = backoff
+
+    def _execute(self, method, request):
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.quota.charge(method)
+            try:
+                return request.execute()
+            except HttpError as e:
+                reason = error_reason(e)
+                if reason in QUOTA_REASONS:
+                    self.quota.exhaust()
+                    raise QuotaExceeded(str(e))
+                if reason not in RATE_LIMIT_REASONS or attempt == RATE_LIMIT_RETRIES:
+                    raise
+                delay = self.backoff * 2 ** attempt
+                print(f"YouTube API rate limited on {method}, retrying in {delay:.0f}s")
+                time.sleep(delay)
+
+    @staticmethod
+    def _to_details(item):
+        """Convert a videos.list item to the dict shape get_video_details returns"""
+        snippet = item.get('snippet', {})
+        thumbnails = snippet.get('thumbnails', {})
+        thumbnail = next((thumbnails[size]['url'] for size in ('maxres', 'standard', 'high', 'medium', 'default')
+                          if size in thumbnails), f"https://img.youtube.com/vi/{item['id']}/maxresdefault.jpg")
+        view_count = item.get('statistics', {}).get('viewCount')
+        return {
+            'id': item['id'],
+            'title': snippet.get('title', ''),
+            'description': snippet.get('description', ''),
+            'publish_date': snippet.get('publishedAt', ''),
+            'url': f"https://www.youtube.com/watch?v={item['id']}",
+            'thumbnail': thumbnail,
+            'duration': parse_duration(item.get('contentDetails', {}).get('duration')),
+            'view_count': int(view_count) if view_count is not None else None,
+        }
+
+    def get_videos_details(self, video_ids):
+        """
+        Details for many videos at once, 50 ids per videos.list call.
+        Cached videos are not requested again.
+
+        Returns:
+            dict: video_id -> details (missing ids are private/removed or failed)
+        """
+        details = {}
+        missing = []
+        for video_id in dict.fromkeys(video_ids):
+            cache_file = os.path.join(CACHE_DIR, f"{video_id}_details.json")
+            try:
+                if os.path.exists(cache_file):
+                    with open(cache_file, 'r') as f:
+                        details[video_id] = json.load(f)
+                    continue
+            except (json.JSONDecodeError, IOError):
+                pass
+            if not negative_cache.get(video_id, 'details'):
+                missing.append(video_id)
+
+        for start in range(0, len(missing), MAX_BATCH):
+            batch = missing[start:start + MAX_BATCH]
+            try:
+                response = self._execute('videos.list', self.service.videos().list(
+                    part='snippet,contentDetails,statistics',
+                    id=','.join(batch)
+                ))
+            except QuotaExceeded as e:
+                if not self.fallback:
+                    raise
+                print(f"YouTube API quota exhausted, scraping the remaining videos: {str(e)}")
+                self._scrape_details(missing[start:], details)
+                break
+            except API_ERRORS as e:
+                if not self.fallback:
+                    raise
+                print(f"videos.list failed, scraping this batch of {len(batch)}: {str(e)}")
+                self._scrape_details(batch, details)
+                continue
+
+            found = set()
+            for item in response.get('items', []):
+                result = self._to_details(item)
+                details[result['id']] = result
+                found.add(result['id'])
+                with open(os.path.join(CACHE_DIR, f"{result['id']}_details.json"), 'w') as f:
+                    json.dump(result, f)
+            # The API silently omits ids it can't return: private, removed or never existed.
+            # It doesn't say which, so use the shorter private TTL: archive uploads do go public later
+            for video_id in batch:
+                if video_id not in found:
+                    negative_cache.put(video_id, 'details', 'private', 'not returned by videos.list')
+        return details
+
+    @staticmethod
+    def _scrape_details(video_ids, details):
+        with ThreadPoolExecutor(max_workers=SCRAPE_WORKERS) as executor:
+            for video_id, result in zip(video_ids, executor.map(scrape_video_details, video_ids)):
+                if result:
+                    details[video_id] = result
+
+    def get_video_details(self, video_id):
+        return self.get_videos_details([video_id]).get(video_id)
+
+    def get_channel_video_ids(self, channel_handle, max_results=50):
+        """Video ids from a channel's uploads playlist, newest first"""
+        try:
+            handle = channel_handle if channel_handle.startswith('@') else f"@{channel_handle}"
+            response = self._execute('channels.list', self.service.channels().list(
+                part='contentDetails',
+                forHandle=handle
+            ))
+            items = response.get('items', [])
+            if not items:
+                print(f"No channel found for {handle}")
+                return []
+            uploads = items[0]['contentDetails']['relatedPlaylists']['uploads']
+
+            video_ids = []
+            page_token = None
+            while len(video_ids) < max_results:
+                response = self._execute('playlistItems.list', self.service.playlistItems().list(
+                    part='contentDetails',
+                    playlistId=uploads,
+                    maxResults=min(MAX_BATCH, max_results - len(video_ids)),
+                    pageToken=page_token
+                ))
+                video_ids.extend(item['contentDetails']['videoId'] for item in response.get('items', []))
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    break
+            print(f"Found {len(video_ids)} video IDs")
+            return video_ids
+        except (QuotaExceeded,) + API_ERRORS as e:
+            if not self.fallback:
+                raise
+            print(f"YouTube API unavailable, scraping the channel page instead: {str(e)}")
+            return scrape_channel_video_ids(channel_handle, max_results)
+
+    def get_channel_videos(self, channel_handle, published_after=None, max_results=50):
+        """Same contract as youtube_scraper.get_channel_videos"""
+        video_ids = self.get_channel_video_ids(channel_handle, max_results)[:max_results]
+        details = self.get_videos_details(video_ids)
+        videos = []
+        for video_id in video_ids:
+            video = details.get(video_id)
+            if not video:
+                continue
+            if published_after and video.get('publish_date'):
+                try:
+                    publish_date = datetime.fromisoformat(video['publish_date'].replace('Z', '+00:00'))
+                    if publish_date.replace(tzinfo=None) < published_after:
+                        continue
+                except ValueError:
+                    # If we can't parse date, include video anyway
+                    pass
+            videos.append(video)
+        return videos
+
+    def get_captions(self, video_id):
+        """
+        Transcript text for a video. Downloading caption tracks through the
+        Data API needs OAuth as the video owner (and 200 units), so this
+        always goes through the scraper's caption backends.
+        """
+        return get_video_transcript(video_id)
+
+def load_youtube_api(api_config=None):
+    """A YouTubeDataAPI if an API key is configured (config or YOUTUBE_API_KEY), else None"""
+    api_config = api_config or {}
+    api_key = os.environ.get('YOUTUBE_API_KEY') or api_config.get('api_key')
+    if not api_key:
+        return None
+    quota = QuotaAccountant(os.path.join(CACHE_DIR, 'api_quota.json'), api_config.get('daily_quota', DAILY_QUOTA))
+    return YouTubeDataAPI(api_key, quota)
@@ -1,9 +1,9 @@
 from pytube import YouTube
+from pytube import exceptions as pytube_exceptions
 from datetime import datetime, timedelta
 import re
 import json
 import time
-import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -13,11 +13,20 @@ from selenium.webdriver.support import expected_conditions as EC
 import random
 import os
 from concurrent.futures import ThreadPoolExecutor
+from utils.backend_health import BackendHealth, BackendError, BackendUnavailable
+from utils.negative_cache import NegativeCache, NegativeResult
+from utils.caption_tracks import fetch_transcript
 
 # Add caching to avoid re-fetching videos
 CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'cache')
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Circuit breakers and success/latency stats for the fetch backends, shared across runs
+backend_health = BackendHealth(os.path.join(CACHE_DIR, 'backend_health.json'))
+
+# Known absences (private/removed videos, missing captions) with per-reason TTLs
+negative_cache = NegativeCache(CACHE_DIR)
+
 # User agents to rotate through to avoid detection
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
@@ -115,11 +124,82 @@ def get_video_details_with_selenium(video_id, use_shared_browser=True):
             driver.quit()
         return None
 
-def get_video_details(video_id):
-    """Get video details with better error handling and fallbacks"""
-    cache_file = os.path.join(CACHE_DIR, f"{video_id}_details.json")
+def _details_from_ytdlp(video_id):
+    """Fetch video details with yt-dlp (if installed)"""
+    try:
+        import yt_dlp
+    except ImportError:
+        raise BackendUnavailable("yt-dlp is not installed")
     
-    # Check cache first with better error handling
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': True,
+        'force_generic_extractor': True,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        try:
+            info = ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False)
+        except yt_dlp.utils.DownloadError as e:
+            # yt-dlp reports unavailable videos as download errors; tell them apart from breakage
+            message = str(e).lower()
+            if 'private video' in message:
+                raise NegativeResult('private', str(e))
+            if 'video unavailable' in message or 'has been removed' in message:
+                raise NegativeResult('unavailable', str(e))
+            raise
+        
+        return {
+            'id': video_id,
+            'title': info.get('title', ''),
+            'description': info.get('description', ''),
+            'publish_date': info.get('upload_date', ''),
+            'url': f"https://www.youtube.com/watch?v={video_id}",
+            'thumbnail': info.get('thumbnail', f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg'),
+            'duration': info.get('duration', None),
+            'view_count': info.get('view_count', None)
+        }
+
+def _details_from_pytube(video_id):
+    """Fetch video details with pytube (uses the innertube player endpoint)"""
+    yt = YouTube(f"https://www.youtube.com/watch?v={video_id}")
+    
+    try:
+        yt.check_availability()
+    except pytube_exceptions.VideoPrivate as e:
+        raise NegativeResult('private', str(e))
+    except pytube_exceptions.VideoUnavailable as e:
+        raise NegativeResult('unavailable', str(e))
+    
+    if not yt.title:
+        raise BackendError("pytube returned an empty title")
+    
+    return {
+        'id': video_id,
+        'title': yt.title or '',
+        'description': yt.description or '',
+        'publish_date': yt.publish_date.isoformat() if yt.publish_date else '',
+        'url': f"https://www.youtube.com/watch?v={video_id}",
+        'thumbnail': yt.thumbnail_url or f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
+    }
+
+def _details_from_selenium(video_id):
+    """Adapter so the Selenium scraper fails by raising, like the other backends"""
+    result = get_video_details_with_selenium(video_id)
+    if not result:
+        raise BackendError("Selenium could not read the watch page")
+    return result
+
+# Fallback chain for video details, in preferred order when nothing is known yet
+DETAILS_BACKENDS = {
+    'yt-dlp': _details_from_ytdlp,
+    'pytube': _details_from_pytube,
+    'selenium': _details_from_selenium,
+}
+
+def get_cached_video_details(video_id):
+    """Video details from the cache only, or None (never fetches)"""
+    cache_file = os.path.join(CACHE_DIR, f"{video_id}_details.json")
     try:
         if os.path.exists(cache_file):
             with open(cache_file, 'r') as f:
@@ -129,82 +209,41 @@ def get_video_details(video_id):
                     return cached_data
     except (json.JSONDecodeError, IOError) as e:
         print(f"Cache read error for {video_id}, regenerating: {str(e)}")
+    return None
+
+def get_video_details(video_id, force_retry=False):
+    """Get video details with better error handling and fallbacks"""
+    cache_file = os.path.join(CACHE_DIR, f"{video_id}_details.json")
     
-    # Try yt-dlp first (if installed)
-    try:
-        import yt_dlp
-        ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': True,
-            'force_generic_extractor': True,
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(f'https://www.youtube.com/watch?v={video_id}', download=False)
-            
-            result = {
-                'id': video_id,
-                'title': info.get('title', ''),
-                'description': info.get('description', ''),
-                'publish_date': info.get('upload_date', ''),
-                'url': f"https://www.youtube.com/watch?v={video_id}",
-                'thumbnail': info.get('thumbnail', f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg'),
-                'duration': info.get('duration', None),
-                'view_count': info.get('view_count', None)
-            }
-            
-            # Cache the result
-            with open(cache_file, 'w') as f:
-                json.dump(result, f)
-                
-            return result
-    except ImportError:
-        pass  # Fall through to pytube
-    except Exception as e:
-        print(f"yt-dlp failed for {video_id}, trying pytube: {str(e)}")
+    # Check cache first with better error handling
+    cached_data = get_cached_video_details(video_id)
+    if cached_data:
+        return cached_data
+    
+    # Skip videos we already know are private/removed (until their TTL runs out)
+    if not force_retry:
+        negative = negative_cache.get(video_id, 'details')
+        if negative:
+            print(f"Skipping {video_id}: cached as {negative['reason']}")
+            return None
     
-    # Then try pytube with better session handling
+    # Try backends healthiest-first; broken ones are skipped by their circuit breaker
     try:
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': random.choice(USER_AGENTS),
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-        })
-        
-        # Create YouTube object with custom session
-        yt = YouTube(
-            f"https://www.youtube.com/watch?v={video_id}",
-            defer_prefetch_init=True,
-            allow_oauth_cache=True
-        )
-        
-        # Manually set the stream monostate session
-        yt._vid_info_url = f"https://www.youtube.com/get_video_info?video_id={video_id}"
-        yt._js_url = None  # Skip JS download which often fails
-        yt._js = None
-        
-        # Get video info
-        video_info = yt.vid_info
-        
-        result = {
-            'id': video_id,
-            'title': yt.title or '',
-            'description': yt.description or '',
-            'publish_date': yt.publish_date.isoformat() if yt.publish_date else '',
-            'url': f"https://www.youtube.com/watch?v={video_id}",
-            'thumbnail': yt.thumbnail_url or f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg',
-        }
-        
+        result = backend_health.call('details', DETAILS_BACKENDS, video_id, stop_on=NegativeResult)
+    except NegativeResult as e:
+        print(f"Video {video_id} is {e.reason}, caching negative result")
+        negative_cache.put(video_id, 'details', e.reason, e.detail)
+        return None
+    
+    if result:
         # Cache the result
         with open(cache_file, 'w') as f:
             json.dump(result, f)
-            
-        return result
-    except Exception as e:
-        print(f"PyTube error for {video_id}, trying Selenium fallback: {str(e)}")
-        return get_video_details_with_selenium(video_id)
+        negative_cache.clear(video_id, 'details')
+    else:
+        negative_cache.put(video_id, 'details', 'transient_error', 'all backends failed')
+    
+    return result
 
 def get_channel_video_ids(channel_handle, max_results=50):
     """Get just the video IDs from a channel"""
@@ -348,6 +387,10 @@ def get_video_transcript_with_selenium(video_id):
                     item.click()
                     time.sleep(2)
                     break
+            else:
+                # Not proof the video has no captions: the menu layout changes and loads lazily
+                driver.quit()
+                raise BackendError('no "Show transcript" menu entry')
             
             # Get transcript text
             transcript_container = driver.find_element(By.CSS_SELECTOR, "div#transcript-scrollbox")
@@ -368,17 +411,71 @@ def get_video_transcript_with_selenium(video_id):
             driver.quit()
             return full_transcript
             
+        except BackendError:
+            raise
         except Exception as e:
             print(f"Selenium error getting transcript: {str(e)}")
             driver.quit()
             return None
             
+    except BackendError:
+        raise
     except Exception as e:
         print(f"Error setting up Selenium for transcript: {str(e)}")
         return None
 
 
-def get_video_transcript(video_id):
+def _transcript_from_timedtext(video_id):
+    """Fetch the best caption track straight from the watch page over plain HTTP"""
+    return fetch_transcript(video_id, USER_AGENTS)
+
+def _transcript_from_pytube(video_id):
+    """Fetch captions with pytube. Raises BackendError when it finds no caption track."""
+    url = f"https://www.youtube.com/watch?v={video_id}"
+    video = YouTube(url)
+    
+    # Get English captions if available
+    caption_tracks = video.captions
+    captions = None
+    
+    # Try to get English captions
+    if 'en' in caption_tracks:
+        captions = caption_tracks['en']
+    elif 'a.en' in caption_tracks:  # Auto-generated English
+        captions = caption_tracks['a.en']
+    else:
+        # Get the first available caption track
+        for lang_code in caption_tracks:
+            captions = caption_tracks[lang_code]
+            break
+    
+    if not captions:
+        # pytube also lists no tracks whenever its player parsing breaks, so let the chain go on
+        raise BackendError("pytube found no caption tracks")
+    
+    # Get transcript as text
+    transcript = captions.generate_srt_captions()
+    
+    # Clean up the transcript (remove timestamps and formatting)
+    cleaned_transcript = re.sub(r'\d+\s+\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}\s+', '', transcript)
+    cleaned_transcript = re.sub(r'\n\n', ' ', cleaned_transcript)
+    return cleaned_transcript
+
+def _transcript_from_selenium(video_id):
+    """Adapter so the Selenium transcript scraper fails by raising"""
+    transcript = get_video_transcript_with_selenium(video_id)
+    if transcript is None:
+        raise BackendError("Selenium could not open the transcript panel")
+    return transcript
+
+# Fallback chain for transcripts, in preferred order when nothing is known yet
+TRANSCRIPT_BACKENDS = {
+    'timedtext': _transcript_from_timedtext,
+    'pytube': _transcript_from_pytube,
+    'selenium': _transcript_from_selenium,
+}
+
+def get_video_transcript(video_id, force_retry=False):
     """Get video transcript/captions without using the API"""
     # Check cache first
     cache_file = os.path.join(CACHE_DIR, f"{video_id}_transcript.txt")
@@ -390,57 +487,28 @@ def get_video_transcript(video_id):
             # If cache read fails, continue with normal flow
             pass
     
+    # Don't relaunch Chrome for videos we already know have no captions
+    if not force_retry:
+        negative = negative_cache.get(video_id, 'transcript')
+        if negative:
+            print(f"Skipping transcript for {video_id}: cached as {negative['reason']}")
+            return None
+    
     try:
-        session = requests.Session()
-        session.headers.update({
-            'User-Agent': random.choice(USER_AGENTS),
-            'Accept-Language': 'en-US,en;q=0.5'
-        })
-        
-        url = f"https://www.youtube.com/watch?v={video_id}"
-        video = YouTube(url)
-        
-        # Attempt to set the session on the pytube object
-        try:
-            video.http = session
-        except:
-            # If this fails, continue anyway
-            pass
-        
-        # Get English captions if available
-        caption_tracks = video.captions
-        captions = None
-        
-        # Try to get English captions
-        if 'en' in caption_tracks:
-            captions = caption_tracks['en']
-        elif 'a.en' in caption_tracks:  # Auto-generated English
-            captions = caption_tracks['a.en']
-        else:
-            # Get the first available caption track
-            for lang_code in caption_tracks:
-                captions = caption_tracks[lang_code]
-                break
-        
-        if captions:
-            # Get transcript as text
-            transcript = captions.generate_srt_captions()
-            
-            # Clean up the transcript (remove timestamps and formatting)
-            cleaned_transcript = re.sub(r'\d+\s+\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3}\s+', '', transcript)
-            cleaned_transcript = re.sub(r'\n\n', ' ', cleaned_transcript)
-            
-            # Cache the result
-            with open(cache_file, 'w') as f:
-                f.write(cleaned_transcript)
-                
-            return cleaned_transcript
-        
+        transcript = backend_health.call('transcript', TRANSCRIPT_BACKENDS, video_id, stop_on=NegativeResult)
+    except NegativeResult as e:
+        negative_cache.put(video_id, 'transcript', e.reason, e.detail)
         return None
-    except Exception as e:
-        print(f"Error getting transcript for {video_id}: {str(e)}")
-        print("Trying Selenium fallback for transcript...")
-        return get_video_transcript_with_selenium(video_id)
+    
+    if transcript:
+        # Cache the result
+        with open(cache_file, 'w') as f:
+            f.write(transcript)
+        negative_cache.clear(video_id, 'transcript')
+    else:
+        negative_cache.put(video_id, 'transcript', 'transient_error', 'all backends failed')
+    
+    return transcript
 
 def get_last_year_timestamp():
     """Get datetime object for one year ago"""
@@ -0,0 +1,158 @@
+# worker.py
+import os
+import json
+import time
+import socket
+import argparse
+from analyzers.remote_classifier import load_classifier
+from analyzers.boilerplate import load_channel_boilerplate, boilerplate_path
+from analyzers.near_duplicates import NearDuplicateIndex
+from utils.work_queue import open_work_queue
+from utils.results_store import write_results, configured_dataset_dir
+from utils.youtube_scraper import (
+    get_channel_video_ids,
+    get_cached_video_details,
+    get_video_details,
+    cleanup,
+    CACHE_DIR
+)
+from main import (
+    load_config,
+    apply_cache_config,
+    load_previous_results,
+    process_video_deduplicated,
+    DUPLICATES_PATH
+)
+
+# Save what workers learn (channel boilerplate, duplicate index) every this many videos, and on exit
+SAVE_EVERY = 10
+
+def enqueue(queue, channel, max_results, requeue=False):
+    """Coordinator: list a channel's videos and put their ids on the queue"""
+    video_ids = get_channel_video_ids(channel, max_results)[:max_results]
+    # Fetching details is the workers' job; learn boilerplate from whatever is already cached
+    # so workers can strip it from their first video
+    cached = [video for video in map(get_cached_video_details, video_ids) if video]
+    load_channel_boilerplate(CACHE_DIR, channel, cached)
+    added = queue.enqueue(channel, video_ids, requeue=requeue)
+    print(f"Enqueued {added} new videos from {channel} ({len(video_ids)} found)")
+
+def save_learned_state(boilerplate_models, duplicate_index):
+    for channel, model in boilerplate_models.items():
+        try:
+            model.save(boilerplate_path(CACHE_DIR, channel))
+        except IOError as e:
+            print(f"Boilerplate model write error for {channel}: {str(e)}")
+    try:
+        duplicate_index.save(DUPLICATES_PATH)
+    except IOError as e:
+        print(f"Near-duplicate index write error: {str(e)}")
+
+def work(queue, worker_id, dataset_dir, classifier_config=None, idle_exit=False, poll_interval=5):
+    """Worker: lease video ids, process them and ack the results until told to stop"""
+    # Load the model once per worker instead of once per video (or use the local classifier server)
+    gpu_classifier = load_classifier(classifier_config)
+    boilerplate_models = {}
+    # Same duplicate check as main.py: re-uploads reuse earlier verdicts, near duplicates go to keywords
+    duplicate_index = NearDuplicateIndex.load(DUPLICATES_PATH)
+    previous_results = load_previous_results(dataset_dir)
+    processed = 0
+
+    try:
+        while True:
+            item = queue.lease(worker_id)
+            if item is None:
+                if idle_exit:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            video_id = item['video_id']
+            print(f"[{worker_id}] Processing {video_id} (attempt {item['attempts']})")
+            try:
+                video = get_video_details(video_id)
+                if video:
+                    # Keep learning the channel's description boilerplate as videos come in
+                    channel = item['channel']
+                    if channel not in boilerplate_models:
+                        boilerplate_models[channel] = load_channel_boilerplate(CACHE_DIR, channel)
+                    boilerplate_models[channel].learn([video])
+                    video['description'] = boilerplate_models[channel].strip(video.get('description', ''))
+                # Unavailable videos are acked empty; the negative cache already knows why
+                result = None
+                if video:
+                    result = process_video_deduplicated(video, gpu_classifier, duplicate_index, previous_results)
+                    if result is None:
+                        raise RuntimeError("process_video returned no result")
+            except Exception as e:
+                print(f"[{worker_id}] Failed {video_id}: {str(e)}")
+                queue.fail(video_id, worker_id, e)
+                continue
+
+            if not queue.ack(video_id, worker_id, result):
+                print(f"[{worker_id}] Lease on {video_id} expired before ack; result dropped")
+            processed += 1
+            if processed % SAVE_EVERY == 0:
+                save_learned_state(boilerplate_models, duplicate_index)
+    except KeyboardInterrupt:
+        print(f"[{worker_id}] Interrupted")
+    finally:
+        save_learned_state(boilerplate_models, duplicate_index)
+        cleanup()
+
+    print(f"[{worker_id}] Processed {processed} videos")
+
+def collect(queue, dataset_dir, channel=None):
+    """Append acked results not collected yet to the results dataset, like main.py does"""
+    # Each result carries the channel its item was queued for and its ack time as processed_at
+    results = queue.results(channel)
+    write_results(results, dataset_dir)
+    queue.mark_collected(result['video_id'] for result in results)
+    print(f"Collected {len(results)} results into {dataset_dir}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Distribute video processing over a shared work queue")
+    parser.add_argument('--queue', help="SQLite queue file (overrides config queue.path)")
+    parser.add_argument('--redis-url', help="Use a Redis-compatible queue instead of SQLite")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help="Queue a channel's videos")
+    enqueue_parser.add_argument('--channel', default="@geohotarchive")
+    enqueue_parser.add_argument('--max-results', type=int, default=30)
+    enqueue_parser.add_argument('--requeue', action='store_true', help="Reprocess videos that are already done")
+
+    work_parser = subparsers.add_parser('work', help="Process queued videos")
+    work_parser.add_argument('--worker-id', default=f"{socket.gethostname()}-{os.getpid()}")
+    work_parser.add_argument('--idle-exit', action='store_true', help="Exit once the queue is empty")
+
+    collect_parser = subparsers.add_parser('collect', help="Append acked results to the results dataset")
+    collect_parser.add_argument('--channel')
+
+    subparsers.add_parser('status', help="Show item counts per status")
+
+    args = parser.parse_args()
+
+    try:
+        config = load_config()
+    except Exception as e:
+        print(f"Error loading config: {str(e)}")
+        config = {}
+    apply_cache_config(config)
+    queue_config = dict(config.get('queue', {}))
+    if args.queue:
+        queue_config['path'] = args.queue
+    if args.redis_url:
+        queue_config['redis_url'] = args.redis_url
+    queue = open_work_queue(queue_config)
+
+    if args.command == 'enqueue':
+        enqueue(queue, args.channel, args.max_results, args.requeue)
+    elif args.command == 'work':
+        work(queue, args.worker_id, configured_dataset_dir(config), config.get('classifier'), args.idle_exit)
+    elif args.command == 'collect':
+        collect(queue, configured_dataset_dir(config), args.channel)
+    elif args.command == 'status':
+        print(json.dumps(queue.stats(), indent=2))
+
+if __name__ == "__main__":
+    main()
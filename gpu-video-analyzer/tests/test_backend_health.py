@@ -0,0 +1,73 @@
+import json
+import threading
+import time
+from utils.backend_health import BackendHealth
+
+
+def open_circuit(health, chain, backend):
+    for _ in range(health.failure_threshold):
+        health.record_failure(chain, backend, 0.1)
+
+
+def test_open_circuit_is_skipped_until_cooldown(tmp_path):
+    health = BackendHealth(str(tmp_path / 'health.json'), cooldown=60)
+    open_circuit(health, 'details', 'a')
+    assert health.order('details', ['a', 'b']) == ['b']
+    assert not health.acquire_trial('details', 'a')
+    assert health.acquire_trial('details', 'a', now=time.time() + 61)
+
+
+def test_half_open_lets_a_single_trial_through(tmp_path):
+    health = BackendHealth(str(tmp_path / 'health.json'), cooldown=60)
+    open_circuit(health, 'details', 'a')
+    later = time.time() + 61
+
+    assert health.acquire_trial('details', 'a', now=later)
+    # Everyone else keeps skipping the backend while the trial is out
+    assert not health.acquire_trial('details', 'a', now=later)
+    assert health.order('details', ['a', 'b']) == ['b']
+    # ...unless the trial itself has been out for a whole cooldown
+    assert health.acquire_trial('details', 'a', now=later + 61)
+
+
+def test_trial_success_closes_the_circuit(tmp_path):
+    health = BackendHealth(str(tmp_path / 'health.json'), cooldown=0.2)
+    open_circuit(health, 'transcript', 'a')
+    time.sleep(0.3)
+    calls = []
+    results = []
+
+    def slow(video_id):
+        calls.append(video_id)
+        time.sleep(0.2)
+        return 'ok'
+
+    threads = [threading.Thread(target=lambda i=i: results.append(health.call('transcript', {'a': slow}, i)))
+               for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results.count('ok') == 1 and results.count(None) == 7
+    assert health.order('transcript', ['a']) == ['a']
+    assert health.acquire_trial('transcript', 'a') and health.acquire_trial('transcript', 'a')
+
+
+def test_trial_failure_reopens_the_circuit(tmp_path):
+    health = BackendHealth(str(tmp_path / 'health.json'), cooldown=60)
+    open_circuit(health, 'details', 'a')
+    later = time.time() + 61
+    assert health.acquire_trial('details', 'a', now=later)
+    health.record_failure('details', 'a', 0.1)
+    assert health.order('details', ['a']) == []
+
+
+def test_state_is_written_atomically(tmp_path):
+    path = tmp_path / 'health.json'
+    health = BackendHealth(str(path))
+    health.record_success('details', 'a', 0.5)
+    assert json.loads(path.read_text())['details']['a']['consecutive_failures'] == 0
+    assert [p.name for p in tmp_path.iterdir()] == ['health.json']
+    assert BackendHealth(str(path)).order('details', ['b', 'a']) == ['a', 'b']
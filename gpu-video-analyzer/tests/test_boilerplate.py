@@ -0,0 +1,55 @@
+from analyzers.boilerplate import BoilerplateModel, boilerplate_path, load_channel_boilerplate
+
+FOOTER = "Follow me: https://twitter.com/example\nMerch: https://shop.example.com"
+
+
+def video(video_id, body):
+    return {'id': video_id, 'description': f"{body}\n{FOOTER}"}
+
+
+def test_footer_is_learned_and_stripped():
+    model = BoilerplateModel('@chan')
+    model.learn([video(f"v{i}", f"topic {i}") for i in range(4)])
+    assert model.strip(f"cuda kernels\n{FOOTER}") == 'cuda kernels'
+
+
+def test_identical_descriptions_count_once():
+    model = BoilerplateModel('@chan')
+    model.learn([{'id': f"v{i}", 'description': 'same re-upload text'} for i in range(5)])
+    assert model.strip('same re-upload text') == 'same re-upload text'
+
+
+def test_concurrent_workers_merge_on_save(tmp_path):
+    path = boilerplate_path(str(tmp_path), '@chan')
+    first = BoilerplateModel.load('@chan', path)
+    second = BoilerplateModel.load('@chan', path)
+    first.learn([video('a', 'one'), video('b', 'two')])
+    second.learn([video('c', 'three'), video('b', 'two')])
+    first.save(path)
+    second.save(path)
+
+    merged = BoilerplateModel.load('@chan', path)
+    assert merged.seen_videos == {'a', 'b', 'c'}
+    # b was learned by both workers but is only counted once
+    assert merged.line_counts['merch: https://shop.example.com'] == 3
+    assert merged.strip(f"cuda\n{FOOTER}") == 'cuda'
+    # The saving worker also picks up what the others learned
+    assert second.seen_videos == {'a', 'b', 'c'}
+
+
+def test_unreadable_file_at_load_does_not_wipe_the_model(tmp_path):
+    path = boilerplate_path(str(tmp_path), '@chan')
+    load_channel_boilerplate(str(tmp_path), '@chan', [video(f"v{i}", str(i)) for i in range(4)])
+    good = open(path).read()
+
+    # A worker that started while the file was briefly unreadable starts empty...
+    open(path, 'w').write(good[:10])
+    worker = BoilerplateModel.load('@chan', path)
+    open(path, 'w').write(good)
+    worker.learn([video('v9', 'nine')])
+    worker.save(path)
+
+    # ...but saving replays only what it learned onto the real model
+    saved = BoilerplateModel.load('@chan', path)
+    assert saved.seen_videos == {'v0', 'v1', 'v2', 'v3', 'v9'}
+    assert not [name for name in tmp_path.iterdir() if name.suffix == '.tmp']
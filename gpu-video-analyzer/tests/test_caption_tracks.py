@@ -0,0 +1,188 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import pytest
+from utils import caption_tracks
+from utils.caption_tracks import choose_caption_track, fetch_caption_segments, fetch_transcript, iter_timed_text
+from utils.backend_health import BackendError
+from utils.negative_cache import NegativeResult
+
+USER_AGENTS = ['Mozilla/5.0 (test)']
+
+# Recorded (trimmed) caption payloads
+SRV3_PAYLOAD = b"""<?xml version="1.0" encoding="utf-8" ?><timedtext format="3">
+<body>
+<p t="0" d="2500"><s>so today</s><s t="400"> we write a</s></p>
+<p t="2500" d="3100">CUDA kernel for matmul</p>
+<p t="5600" d="1200"></p>
+<p t="6800" d="2000">tensor cores &amp; shared memory</p>
+</body>
+</timedtext>"""
+
+LEGACY_PAYLOAD = b"""<?xml version="1.0" encoding="utf-8" ?><transcript>
+<text start="0.5" dur="2.1">it&amp;#39;s the
+  warp scheduler</text>
+<text start="2.6" dur="1.4">tinygrad</text>
+</transcript>"""
+
+
+def watch_page(player_response):
+    return (
+        "<html><head><script>var ytInitialPlayerResponse = "
+        f"{json.dumps(player_response)};var meta = {{}};</script></head><body></body></html>"
+    ).encode('utf-8')
+
+
+def track(base_url, language, kind=None, name=''):
+    entry = {'baseUrl': base_url, 'languageCode': language, 'name': {'simpleText': name}}
+    if kind:
+        entry['kind'] = kind
+    return entry
+
+
+class StubYouTube:
+    """Serves watch pages and timed-text payloads from localhost, recording every request"""
+
+    def __init__(self):
+        self.pages = {}
+        self.captions = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+                stub.requests.append((parts.path, query))
+                if parts.path == '/watch':
+                    body = stub.pages.get(query.get('v'))
+                else:
+                    body = stub.captions.get(query.get('lang'))
+                if body is None:
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def caption_url(self, language, kind=None):
+        url = f"{self.base}/api/timedtext?v=vid&lang={language}&fmt=vtt"
+        return url + (f"&kind={kind}" if kind else '')
+
+
+@pytest.fixture
+def youtube(monkeypatch):
+    stub = StubYouTube()
+    monkeypatch.setattr(caption_tracks, 'WATCH_URL', stub.base + '/watch?v={video_id}')
+    # Tiny chunks so segments and entities are split across parser feeds
+    monkeypatch.setattr(caption_tracks, 'CHUNK_SIZE', 7)
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+
+
+def test_track_preference():
+    manual_de = track('de', 'de')
+    asr_en = track('asr', 'en', kind='asr')
+    manual_en = track('en-GB', 'en-GB')
+    assert choose_caption_track([manual_de, asr_en, manual_en]) is manual_en
+    assert choose_caption_track([manual_de, asr_en]) is asr_en
+    assert choose_caption_track([manual_de, track('fr', 'fr')]) is manual_de
+    assert choose_caption_track([]) is None
+
+
+def test_fetch_prefers_manual_english_and_asks_for_srv3(youtube):
+    youtube.pages['vid'] = watch_page({
+        'playabilityStatus': {'status': 'OK'},
+        'captions': {'playerCaptionsTracklistRenderer': {'captionTracks': [
+            track(youtube.caption_url('de'), 'de'),
+            track(youtube.caption_url('en', 'asr'), 'en', kind='asr'),
+            track(youtube.caption_url('en'), 'en'),
+        ]}},
+    })
+    youtube.captions['en'] = SRV3_PAYLOAD
+
+    segments = list(fetch_caption_segments('vid', USER_AGENTS))
+
+    assert segments == [
+        {'start': 0.0, 'duration': 2.5, 'text': 'so today we write a'},
+        {'start': 2.5, 'duration': 3.1, 'text': 'CUDA kernel for matmul'},
+        {'start': 6.8, 'duration': 2.0, 'text': 'tensor cores & shared memory'},
+    ]
+    path, query = youtube.requests[-1]
+    assert path == '/api/timedtext'
+    assert query['lang'] == 'en' and 'kind' not in query and query['fmt'] == 'srv3'
+
+
+def test_fetch_falls_back_to_auto_generated_english(youtube):
+    youtube.pages['vid'] = watch_page({
+        'captions': {'playerCaptionsTracklistRenderer': {'captionTracks': [
+            track(youtube.caption_url('de'), 'de'),
+            track(youtube.caption_url('en', 'asr'), 'en', kind='asr'),
+        ]}},
+    })
+    youtube.captions['en'] = SRV3_PAYLOAD
+
+    assert fetch_transcript('vid', USER_AGENTS).startswith('so today we write a CUDA kernel')
+    assert youtube.requests[-1][1]['kind'] == 'asr'
+
+
+def test_legacy_payload_parsed_in_small_chunks():
+    chunks = [LEGACY_PAYLOAD[i:i + 7] for i in range(0, len(LEGACY_PAYLOAD), 7)]
+    assert list(iter_timed_text(chunks)) == [
+        {'start': 0.5, 'duration': 2.1, 'text': "it's the warp scheduler"},
+        {'start': 2.6, 'duration': 1.4, 'text': 'tinygrad'},
+    ]
+
+
+@pytest.mark.parametrize('player_response, reason', [
+    ({'playabilityStatus': {'status': 'LOGIN_REQUIRED', 'reason': 'This video is private'}}, 'private'),
+    ({'playabilityStatus': {'status': 'ERROR', 'reason': 'Video unavailable'}}, 'unavailable'),
+    ({'playabilityStatus': {'status': 'OK'}}, 'no_captions'),
+    ({'playabilityStatus': {'status': 'OK'},
+      'captions': {'playerCaptionsTracklistRenderer': {'captionTracks': []}}}, 'no_captions'),
+])
+def test_negative_results(youtube, player_response, reason):
+    youtube.pages['vid'] = watch_page(player_response)
+    with pytest.raises(NegativeResult) as excinfo:
+        fetch_transcript('vid', USER_AGENTS)
+    assert excinfo.value.reason == reason
+    # Nothing to download: no caption request was made
+    assert [path for path, _ in youtube.requests] == ['/watch']
+
+
+@pytest.mark.parametrize('reason', [
+    "Sign in to confirm you\u2019re not a bot",
+    'Sign in to confirm your age',
+    '',
+])
+def test_other_login_walls_fall_through_to_the_next_backend(youtube, reason):
+    youtube.pages['vid'] = watch_page({'playabilityStatus': {'status': 'LOGIN_REQUIRED', 'reason': reason}})
+    with pytest.raises(BackendError):
+        fetch_transcript('vid', USER_AGENTS)
+
+
+def test_empty_track_is_no_captions(youtube):
+    youtube.pages['vid'] = watch_page({
+        'captions': {'playerCaptionsTracklistRenderer': {'captionTracks': [track(youtube.caption_url('en'), 'en')]}},
+    })
+    youtube.captions['en'] = b'<?xml version="1.0" encoding="utf-8" ?><timedtext format="3"><body></body></timedtext>'
+    with pytest.raises(NegativeResult) as excinfo:
+        fetch_transcript('vid', USER_AGENTS)
+    assert excinfo.value.reason == 'no_captions'
+
+
+def test_page_without_player_response_is_an_error(youtube):
+    youtube.pages['vid'] = b'<html><body>consent.youtube.com</body></html>'
+    with pytest.raises(ValueError):
+        list(fetch_caption_segments('vid', USER_AGENTS))
@@ -0,0 +1,62 @@
+import json
+from datetime import datetime, timezone
+from analyzers.keyword_analytics import KeywordAnalytics
+from utils.results_store import write_results, import_json_results
+
+
+def result(video_id, title, is_gpu=True):
+    return {'video_id': video_id, 'title': title, 'is_gpu_related': is_gpu, 'confidence': 0.9}
+
+
+def test_update_reads_only_new_files(tmp_path):
+    dataset_dir = str(tmp_path / 'results')
+    write_results([result('a', 'cuda kernels'), result('b', 'cooking pasta', False)], dataset_dir)
+
+    analytics = KeywordAnalytics(str(tmp_path / 'index'))
+    assert analytics.update(dataset_dir) == 2
+    assert analytics.update(dataset_dir) == 0
+    analytics.save()
+
+    write_results([result('c', 'cuda streams')], dataset_dir)
+    reloaded = KeywordAnalytics(str(tmp_path / 'index'))
+    assert reloaded.update(dataset_dir) == 1
+    assert dict(reloaded.top_k(gpu=True))['cuda'] == 2
+
+
+def test_import_after_index_exists(tmp_path):
+    dataset_dir = str(tmp_path / 'results')
+    index_dir = str(tmp_path / 'index')
+    write_results([result('new', 'tinygrad tensor cores')], dataset_dir)
+    analytics = KeywordAnalytics(index_dir)
+    analytics.update(dataset_dir)
+    analytics.save()
+
+    # Old dumps carry timestamps from before anything already in the index
+    dumps_dir = tmp_path / 'processed'
+    dumps_dir.mkdir()
+    old_results = [result(f"old{i}", f"gpu memory video {i}") for i in range(20)]
+    (dumps_dir / 'gpu_videos_20250401_120000.json').write_text(json.dumps(old_results))
+    assert import_json_results(str(dumps_dir), dataset_dir) == 20
+
+    analytics = KeywordAnalytics(index_dir)
+    assert analytics.update(dataset_dir) == 20
+    assert len(analytics.video_ids) == 21
+    assert dict(analytics.top_k(gpu=True))['memory'] == 20
+
+
+def test_late_older_result_does_not_replace_newer(tmp_path):
+    dataset_dir = str(tmp_path / 'results')
+    analytics = KeywordAnalytics(str(tmp_path / 'index'))
+    write_results([result('a', 'cuda kernels')], dataset_dir)
+    analytics.update(dataset_dir)
+
+    # A worker with a slow clock collects an older verdict for the same video afterwards
+    write_results([result('a', 'cooking pasta', False)], dataset_dir,
+                  processed_at=datetime(2025, 1, 1, tzinfo=timezone.utc))
+    assert analytics.update(dataset_dir) == 0
+    assert list(analytics.video_ids) == ['a']
+    assert dict(analytics.top_k(gpu=True)) == {'cuda': 1, 'kernels': 1}
+
+    write_results([result('a', 'cuda graphs')], dataset_dir)
+    assert analytics.update(dataset_dir) == 1
+    assert dict(analytics.top_k(gpu=True)) == {'cuda': 1, 'graphs': 1}
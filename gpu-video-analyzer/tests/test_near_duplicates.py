@@ -0,0 +1,92 @@
+import pytest
+import main
+from analyzers.near_duplicates import NearDuplicateIndex
+from main import process_video_deduplicated
+
+STREAM = "tinygrad development stream: writing a CUDA matmul kernel with tensor cores and shared memory tiling"
+
+
+def video(video_id, title=STREAM, description='live coding on the tinybox, part one of the series', duration=3600):
+    return {'id': video_id, 'title': title, 'description': description, 'duration': duration}
+
+
+class FakeClassifier:
+    """Records which tier classified each title"""
+
+    def __init__(self):
+        self.calls = []
+
+    def is_gpu_related(self, title, description):
+        self.calls.append(('llm', title))
+        return True, 0.95, 'LLM verdict'
+
+    def is_gpu_related_cheap(self, title, description):
+        self.calls.append(('keywords', title))
+        return False, 0.3, 'keyword verdict'
+
+
+@pytest.fixture
+def classifier(monkeypatch):
+    monkeypatch.setattr(main, 'get_video_transcript', lambda video_id: None)
+    return FakeClassifier()
+
+
+def test_near_duplicate_without_a_verdict_gets_the_keyword_tier(classifier):
+    index = NearDuplicateIndex()
+    previous = {}
+    process_video_deduplicated(video('a'), classifier, index, previous)
+    result = process_video_deduplicated(video('b', description='live coding on the tinybox, part two of the series',
+                                              duration=4000), classifier, index, previous)
+
+    assert [tier for tier, _ in classifier.calls] == ['llm', 'keywords']
+    assert result['duplicate_of'] == 'a' and result['duplicate_kind'] == 'near'
+
+
+def test_rerun_keeps_the_videos_own_llm_verdict(classifier):
+    index = NearDuplicateIndex()
+    previous = {}
+    part_one = video('a')
+    part_two = video('b', description='live coding on the tinybox, part two of the series', duration=4000)
+    process_video_deduplicated(part_two, classifier, index, previous)
+    process_video_deduplicated(part_one, classifier, index, previous)
+    assert [tier for tier, _ in classifier.calls] == ['llm', 'keywords']
+    classifier.calls.clear()
+
+    # On a re-run 'b' near-matches 'a', but it has an LLM verdict of its own: keep it
+    result = process_video_deduplicated(part_two, classifier, index, previous)
+
+    assert classifier.calls == []
+    assert result['reasoning'] == 'LLM verdict' and 'duplicate_kind' not in result
+
+
+def test_keyword_verdict_is_upgraded_once_the_match_is_gone(classifier):
+    index = NearDuplicateIndex()
+    previous = {'a': {'video_id': 'a', 'is_gpu_related': False, 'confidence': 0.3, 'reasoning': 'keyword verdict',
+                      'duplicate_of': 'gone', 'duplicate_kind': 'near'}}
+
+    result = process_video_deduplicated(video('a'), classifier, index, previous)
+
+    assert classifier.calls == [('llm', STREAM)]
+    assert result['reasoning'] == 'LLM verdict' and 'duplicate_kind' not in result
+
+
+def test_concurrent_saves_merge(tmp_path):
+    path = str(tmp_path / 'near_duplicates.json')
+    seed = NearDuplicateIndex()
+    seed.add(video('old'))
+    seed.add(video('dropped', title='cooking pasta at home', description='recipe'))
+    seed.save(path)
+
+    first = NearDuplicateIndex.load(path)
+    second = NearDuplicateIndex.load(path)
+    first.add(video('a', title='tinygrad tensor cores', description='part one'))
+    first.remove('dropped')
+    second.add(video('b', title='metal shaders on the m1', description='part two'))
+    first.save(path)
+    second.save(path)
+
+    merged = NearDuplicateIndex.load(path)
+    assert set(merged.videos) == {'old', 'a', 'b'}
+    assert set(second.videos) == {'old', 'a', 'b'}
+    assert merged.match(video('again'))['video_id'] == 'old'
+    assert not list(tmp_path.glob('*.tmp'))
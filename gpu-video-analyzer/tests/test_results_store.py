@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+import pytest
+from utils.results_store import read_results, write_results
+
+OCT_1 = datetime(2025, 10, 1, 12, tzinfo=timezone.utc)
+OCT_10 = datetime(2025, 10, 10, 12, tzinfo=timezone.utc)
+
+
+def result(video_id, is_gpu_related, confidence, channel='@geohotarchive'):
+    return {'video_id': video_id, 'channel': channel, 'title': f"Video {video_id}",
+            'is_gpu_related': is_gpu_related, 'confidence': confidence}
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    dataset_dir = str(tmp_path / 'results')
+    write_results([result('reclassified', True, 0.95), result('steady', True, 0.9)], dataset_dir, processed_at=OCT_1)
+    write_results([result('reclassified', False, 0.2), result('steady', True, 0.97)], dataset_dir, processed_at=OCT_10)
+    return dataset_dir
+
+
+@pytest.mark.parametrize('filters', [
+    {'gpu_only': True},
+    {'min_confidence': 0.5},
+    {'gpu_only': True, 'min_confidence': 0.5},
+])
+def test_verdict_filters_apply_to_the_latest_run_only(dataset, filters):
+    frame = read_results(dataset, columns=['video_id', 'confidence'], **filters)
+
+    assert frame.to_dict('records') == [{'video_id': 'steady', 'confidence': 0.97}]
+
+
+def test_latest_only_returns_the_newest_row_per_video(dataset):
+    frame = read_results(dataset, columns=['video_id', 'is_gpu_related'])
+
+    assert sorted(frame.itertuples(index=False)) == [('reclassified', False), ('steady', True)]
+
+
+def test_without_latest_only_every_matching_run_is_returned(dataset):
+    frame = read_results(dataset, columns=['video_id', 'confidence'], gpu_only=True, latest_only=False)
+
+    assert sorted(frame.itertuples(index=False)) == [('reclassified', 0.95), ('steady', 0.9), ('steady', 0.97)]
+
+
+def test_channel_filter_follows_the_latest_run(tmp_path):
+    dataset_dir = str(tmp_path / 'results')
+    write_results([result('moved', True, 0.9, channel='@old')], dataset_dir, processed_at=OCT_1)
+    write_results([result('moved', True, 0.9, channel='@new')], dataset_dir, processed_at=OCT_10)
+
+    assert read_results(dataset_dir, columns=['video_id'], channel='@old').empty
+    assert list(read_results(dataset_dir, columns=['video_id'], channel='@new')['video_id']) == ['moved']
@@ -0,0 +1,109 @@
+import time
+import pytest
+from utils.work_queue import SQLiteWorkQueue, RedisWorkQueue
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def make_queue(request, tmp_path):
+    """Factory for fresh queues of either backend; calls share one store"""
+    if request.param == 'sqlite':
+        path = str(tmp_path / 'queue.sqlite')
+        return lambda **kwargs: SQLiteWorkQueue(path, **kwargs)
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    server = fakeredis.FakeServer()
+    return lambda **kwargs: RedisWorkQueue(
+        None, client=fakeredis.FakeStrictRedis(server=server, decode_responses=True), **kwargs)
+
+
+def test_lease_ack_and_results(make_queue):
+    queue = make_queue()
+    assert queue.enqueue('@chan', ['a', 'b']) == 2
+    assert queue.enqueue('@chan', ['a']) == 0
+
+    item = queue.lease('w1')
+    assert item == {'video_id': 'a', 'channel': '@chan', 'attempts': 1}
+    assert queue.ack('a', 'w1', {'video_id': 'a', 'is_gpu_related': True})
+    # Acking twice, or acking someone else's lease, is refused
+    assert not queue.ack('a', 'w1', {})
+    assert queue.lease('w2')['video_id'] == 'b'
+    assert not queue.ack('b', 'w1', {})
+
+    # Results carry the channel the item was queued for and the ack time, so collect can write them per row
+    [result] = queue.results()
+    processed_at = result.pop('processed_at')
+    assert result == {'video_id': 'a', 'is_gpu_related': True, 'channel': '@chan'}
+    assert abs(processed_at.timestamp() - time.time()) < 5 and processed_at.tzinfo is not None
+    assert queue.results('@chan') == queue.results()
+    assert queue.results('@other') == []
+    assert queue.stats() == {'done': 1, 'leased': 1}
+
+
+def test_fail_retries_until_max_attempts(make_queue):
+    queue = make_queue(max_attempts=2)
+    queue.enqueue('@chan', ['a'])
+    assert queue.fail(queue.lease('w1')['video_id'], 'w1', 'boom')
+    assert queue.lease('w1')['attempts'] == 2
+    assert queue.fail('a', 'w1', 'boom again')
+    assert queue.lease('w1') is None
+    assert queue.stats() == {'failed': 1}
+
+
+def test_expired_lease_is_handed_out_again(make_queue):
+    queue = make_queue(lease_seconds=-1, max_attempts=2)
+    queue.enqueue('@chan', ['a'])
+    assert queue.lease('crashed')['attempts'] == 1
+    # The first worker never acks; its lease has already run out
+    item = queue.lease('w2')
+    assert item['video_id'] == 'a' and item['attempts'] == 2
+    assert not queue.ack('a', 'crashed', {})
+    # Out of attempts: parked as failed instead of leased forever
+    assert queue.lease('w3') is None
+    assert queue.stats() == {'failed': 1}
+
+
+def test_requeue_resets_done_items(make_queue):
+    queue = make_queue()
+    queue.enqueue('@chan', ['a'])
+    queue.ack(queue.lease('w1')['video_id'], 'w1', {'video_id': 'a'})
+    assert queue.enqueue('@chan', ['a'], requeue=True) == 1
+    assert queue.lease('w1')['attempts'] == 1
+    assert queue.results() == []
+
+
+def test_collected_results_are_not_returned_again(make_queue):
+    queue = make_queue()
+    queue.enqueue('@chan', ['a', 'b'])
+    queue.ack(queue.lease('w1')['video_id'], 'w1', {'video_id': 'a'})
+    acked_at = queue.results()[0]['processed_at']
+
+    queue.mark_collected(['a'])
+    assert queue.results() == []
+    [result] = queue.results(include_collected=True)
+    assert result['processed_at'] == acked_at
+
+    queue.ack(queue.lease('w1')['video_id'], 'w1', {'video_id': 'b'})
+    assert [result['video_id'] for result in queue.results()] == ['b']
+
+    # Reprocessing a collected item makes it collectable again
+    queue.enqueue('@chan', ['a'], requeue=True)
+    queue.ack(queue.lease('w1')['video_id'], 'w1', {'video_id': 'a'})
+    assert sorted(result['video_id'] for result in queue.results()) == ['a', 'b']
+
+
+def test_existing_sqlite_queue_gains_the_new_columns(tmp_path):
+    import sqlite3
+    path = str(tmp_path / 'queue.sqlite')
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE work_items (video_id TEXT PRIMARY KEY, channel TEXT, "
+                 "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, worker_id TEXT, "
+                 "lease_expires REAL, result TEXT, error TEXT, enqueued_at REAL, updated_at REAL)")
+    conn.execute("INSERT INTO work_items (video_id, channel, status, result) "
+                 "VALUES ('old', '@chan', 'done', '{\"video_id\": \"old\"}')")
+    conn.commit()
+    conn.close()
+
+    queue = SQLiteWorkQueue(path)
+    assert queue.results() == [{'video_id': 'old', 'channel': '@chan'}]
+    queue.mark_collected(['old'])
+    assert queue.results() == []
@@ -0,0 +1,195 @@
+import json
+from urllib.parse import urlsplit, parse_qs
+import pytest
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+from utils import youtube_api
+from utils.negative_cache import NegativeCache
+from utils.youtube_api import QuotaAccountant, YouTubeDataAPI, parse_duration
+
+
+class YouTubeHttp(HttpMockSequence):
+    """HttpMockSequence that also raises exceptions placed in the sequence (network failures)"""
+
+    def request(self, uri, *args, **kwargs):
+        if self._iterable and isinstance(self._iterable[0], Exception):
+            self.request_sequence.append((uri, None, None, None))
+            raise self._iterable.pop(0)
+        return super().request(uri, *args, **kwargs)
+
+    def calls(self, method):
+        """Query parameters of every request made to an API path like 'videos'"""
+        paths = [(urlsplit(uri).path, parse_qs(urlsplit(uri).query)) for uri, *_ in self.request_sequence]
+        return [{key: values[0] for key, values in query.items()}
+                for path, query in paths if path == f"/youtube/v3/{method}"]
+
+
+def ok(body):
+    return ({'status': '200'}, json.dumps(body))
+
+
+def http_error(status, reason):
+    return ({'status': str(status)}, json.dumps({'error': {'code': status, 'errors': [{'reason': reason}]}}))
+
+
+def videos_page(video_ids, private=()):
+    return ok({'items': [{
+        'id': video_id,
+        'snippet': {'title': f"Video {video_id}", 'description': 'desc', 'publishedAt': '2025-01-01T00:00:00Z',
+                    'thumbnails': {'high': {'url': f"https://i.ytimg.com/{video_id}.jpg"}}},
+        'contentDetails': {'duration': 'PT1H2M3S'},
+        'statistics': {'viewCount': '42'},
+    } for video_id in video_ids if video_id not in private]})
+
+
+def uploads_pages(video_ids, sizes):
+    """channels.list for the handle, then playlistItems.list pages of the given sizes"""
+    responses = [ok({'items': [{'contentDetails': {'relatedPlaylists': {'uploads': 'UU123'}}}]})]
+    start = 0
+    for size in sizes:
+        page = {'items': [{'contentDetails': {'videoId': video_id}} for video_id in video_ids[start:start + size]]}
+        start += size
+        if start < len(video_ids):
+            page['nextPageToken'] = str(start)
+        responses.append(ok(page))
+    return responses
+
+
+@pytest.fixture
+def scraped(monkeypatch, tmp_path):
+    """Keep cache files in tmp_path and record what falls back to the scraper"""
+    monkeypatch.setattr(youtube_api, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(youtube_api, 'negative_cache', NegativeCache(str(tmp_path)))
+    calls = {'details': [], 'channel': []}
+
+    def scrape_video_details(video_id):
+        calls['details'].append(video_id)
+        return {'id': video_id, 'title': f"Scraped {video_id}"}
+
+    def scrape_channel_video_ids(channel_handle, max_results):
+        calls['channel'].append(channel_handle)
+        return ['s1', 's2']
+
+    monkeypatch.setattr(youtube_api, 'scrape_video_details', scrape_video_details)
+    monkeypatch.setattr(youtube_api, 'scrape_channel_video_ids', scrape_channel_video_ids)
+    return calls
+
+
+def make_api(responses, tmp_path, daily_quota=10000):
+    http = YouTubeHttp(list(responses))
+    service = build('youtube', 'v3', http=http, developerKey='test-key', static_discovery=True)
+    quota = QuotaAccountant(str(tmp_path / 'quota.json'), daily_quota)
+    return YouTubeDataAPI(None, quota=quota, service=service, backoff=0), http
+
+
+def test_details_are_batched_fifty_ids_per_call(scraped, tmp_path):
+    ids = [f"v{i}" for i in range(120)]
+    api, http = make_api([videos_page(ids[:50], private={'v7'}), videos_page(ids[50:100]), videos_page(ids[100:])],
+                         tmp_path)
+
+    details = api.get_videos_details(ids)
+
+    batches = http.calls('videos')
+    assert [params['id'].split(',') for params in batches] == [ids[:50], ids[50:100], ids[100:]]
+    assert all('maxResults' not in params and params['key'] == 'test-key' for params in batches)
+    assert set(batches[0]['part'].split(',')) == {'snippet', 'contentDetails', 'statistics'}
+    assert len(details) == 119 and 'v7' not in details
+    assert details['v0']['duration'] == 3723 and details['v0']['view_count'] == 42
+    assert api.quota.used == 3
+    assert scraped['details'] == []
+    # The API can't tell private from removed, so omitted ids get the shorter private TTL
+    assert youtube_api.negative_cache.get('v7', 'details')['reason'] == 'private'
+
+    # Cached and known-missing videos are not requested again
+    assert len(api.get_videos_details(ids)) == 119
+    assert len(http.calls('videos')) == 3
+
+
+def test_channel_listing_pages_through_uploads(scraped, tmp_path):
+    uploads = [f"u{i}" for i in range(130)]
+    api, http = make_api(uploads_pages(uploads, [50, 50, 20]), tmp_path)
+
+    video_ids = api.get_channel_video_ids('geohotarchive', max_results=120)
+
+    assert video_ids == uploads[:120]
+    assert http.calls('channels') == [{'part': 'contentDetails', 'forHandle': '@geohotarchive', 'key': 'test-key',
+                                      'alt': 'json'}]
+    pages = http.calls('playlistItems')
+    assert [params['playlistId'] for params in pages] == ['UU123'] * 3
+    assert [(params['maxResults'], params.get('pageToken')) for params in pages] == \
+        [('50', None), ('50', '50'), ('20', '100')]
+    assert api.quota.used == 4
+
+    http._iterable.extend(uploads_pages(uploads, [50, 50, 20]) +
+                          [videos_page(uploads[:50]), videos_page(uploads[50:100]), videos_page(uploads[100:120])])
+    videos = api.get_channel_videos('@geohotarchive', max_results=120)
+    assert len(videos) == 120
+    assert len(http.calls('videos')) == 3
+
+
+def test_quota_is_shared_across_instances(tmp_path):
+    QuotaAccountant(str(tmp_path / 'quota.json')).charge('videos.list')
+    assert QuotaAccountant(str(tmp_path / 'quota.json')).remaining == 9999
+
+
+def test_local_quota_runs_out_and_switches_to_scraper(scraped, tmp_path):
+    ids = [f"v{i}" for i in range(120)]
+    api, http = make_api([videos_page(ids[:50])], tmp_path, daily_quota=1)
+
+    details = api.get_videos_details(ids)
+
+    assert len(http.calls('videos')) == 1
+    assert sorted(scraped['details']) == sorted(ids[50:])
+    assert details['v50']['title'] == 'Scraped v50'
+    assert api.quota.remaining == 0
+
+
+def test_api_quota_error_exhausts_quota_and_switches_to_scraper(scraped, tmp_path):
+    ids = [f"v{i}" for i in range(120)]
+    api, http = make_api([videos_page(ids[:50]), http_error(403, 'quotaExceeded')], tmp_path)
+
+    api.get_videos_details(ids)
+
+    assert len(http.calls('videos')) == 2
+    assert sorted(scraped['details']) == sorted(ids[50:])
+    assert api.quota.remaining == 0
+    # The rest of the day goes straight to the scraper
+    assert api.get_channel_video_ids('@geohotarchive') == ['s1', 's2']
+    assert http.calls('channels') == []
+
+
+def test_rate_limit_is_retried_not_treated_as_quota(scraped, tmp_path):
+    api, http = make_api([http_error(403, 'rateLimitExceeded'), http_error(403, 'userRateLimitExceeded'),
+                          videos_page(['a', 'b'])], tmp_path)
+
+    details = api.get_videos_details(['a', 'b'])
+
+    assert set(details) == {'a', 'b'}
+    assert len(http.calls('videos')) == 3
+    assert scraped['details'] == []
+    assert api.quota.used == 3 and api.quota.remaining > 0
+
+
+def test_other_errors_fall_back_per_batch(scraped, tmp_path):
+    ids = [f"v{i}" for i in range(120)]
+    api, http = make_api([http_error(500, 'backendError'), OSError('connection reset'), videos_page(ids[100:])],
+                         tmp_path)
+
+    details = api.get_videos_details(ids)
+
+    assert len(details) == 120
+    assert sorted(scraped['details']) == sorted(ids[:100])
+    assert details['v100']['title'] == 'Video v100'
+
+
+def test_channel_listing_error_falls_back_to_scraper(scraped, tmp_path):
+    api, http = make_api([http_error(400, 'keyInvalid')], tmp_path)
+
+    assert api.get_channel_video_ids('@geohotarchive') == ['s1', 's2']
+    assert scraped['channel'] == ['@geohotarchive']
+
+
+def test_parse_duration():
+    assert parse_duration('PT45S') == 45
+    assert parse_duration('P1DT2M') == 86520
+    assert parse_duration(None) is None
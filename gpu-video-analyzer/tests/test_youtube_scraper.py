@@ -0,0 +1,49 @@
+import pytest
+from utils import youtube_scraper
+from utils.backend_health import BackendError, BackendHealth
+from utils.negative_cache import NegativeCache, NegativeResult
+
+
+class NoCaptionsYouTube:
+    """pytube's YouTube when its player parsing breaks: no caption tracks at all"""
+
+    def __init__(self, url):
+        self.captions = {}
+
+
+@pytest.fixture
+def scraper(monkeypatch, tmp_path):
+    monkeypatch.setattr(youtube_scraper, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(youtube_scraper, 'negative_cache', NegativeCache(str(tmp_path)))
+    monkeypatch.setattr(youtube_scraper, 'backend_health', BackendHealth(str(tmp_path / 'health.json')))
+    monkeypatch.setattr(youtube_scraper, 'YouTube', NoCaptionsYouTube)
+    return youtube_scraper
+
+
+def test_pytube_without_tracks_is_not_a_negative_result(scraper):
+    with pytest.raises(BackendError):
+        scraper._transcript_from_pytube('vid')
+
+
+def test_unreliable_absence_falls_through_the_chain(scraper, monkeypatch):
+    monkeypatch.setattr(scraper, 'TRANSCRIPT_BACKENDS', {
+        'pytube': scraper._transcript_from_pytube,
+        'selenium': lambda video_id: 'the transcript',
+    })
+    assert scraper.get_video_transcript('vid') == 'the transcript'
+    assert scraper.negative_cache.get('vid', 'transcript') is None
+
+
+def test_reliable_absence_stops_the_chain_and_is_cached(scraper, monkeypatch):
+    calls = []
+
+    def no_captions(video_id):
+        raise NegativeResult('no_captions')
+
+    monkeypatch.setattr(scraper, 'TRANSCRIPT_BACKENDS', {
+        'timedtext': no_captions,
+        'selenium': lambda video_id: calls.append(video_id),
+    })
+    assert scraper.get_video_transcript('vid') is None
+    assert calls == []
+    assert scraper.negative_cache.get('vid', 'transcript')['reason'] == 'no_captions'